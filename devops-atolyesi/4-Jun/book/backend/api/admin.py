@@ -1,10 +1,49 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Librarian, Student, Book, Loan
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import User, Librarian, Student, Book, Loan, LoanArchive, Task
 from .forms import CustomUserChangeForm
 
+
+# ------------------------------
+# Changelist counts
+# - An unfiltered changelist takes its row count from MySQL's table
+#   statistics once they pass ADMIN_EXACT_COUNT_LIMIT, instead of COUNT(*)
+# - Filtered or searched pages, small tables and other databases count exactly
+# ------------------------------
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None or query.where:
+            return super().count
+
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'mysql':
+            return super().count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES"
+                " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] is None or row[0] < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return row[0]
+
+
+class FastChangeListMixin:
+    paginator = EstimatedCountPaginator
+    # No second COUNT(*) for "x of y selected", no per-filter facet counts
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
 # Custom User Admin
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(FastChangeListMixin, BaseUserAdmin):
     model = User
     form = CustomUserChangeForm
     list_display = ('email', 'first_name', 'last_name', 'role', 'is_staff', 'is_active')
@@ -25,25 +64,51 @@ class CustomUserAdmin(BaseUserAdmin):
     )
 
 # Librarian Admin
-class LibrarianAdmin(admin.ModelAdmin):
+class LibrarianAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('name', 'employee_number', 'user')
+    list_select_related = ('user',)
     search_fields = ('name', 'employee_number')
+    autocomplete_fields = ('user',)
 
 # Student Admin
-class StudentAdmin(admin.ModelAdmin):
+class StudentAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('name', 'student_number', 'user')
+    list_select_related = ('user',)
     search_fields = ('name', 'student_number')
+    autocomplete_fields = ('user',)
 
 # Book Admin
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'is_available')
     search_fields = ('title', 'author')
 
 # Loan Admin
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('book', 'student', 'loan_date', 'return_date', 'is_returned', 'actual_return_date')
+    list_select_related = ('book', 'student')
     list_filter = ('is_returned',)
     search_fields = ('book__title', 'student__name')
+    autocomplete_fields = ('book', 'student')
+
+# Loan Archive Admin (read-only history)
+class LoanArchiveAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('id', 'book', 'student', 'loan_date', 'actual_return_date', 'archived_at')
+    list_select_related = ('book', 'student')
+    search_fields = ('book__title', 'student__name')
+    raw_id_fields = ('student', 'book')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Task Admin (background queue; failed tasks keep their last error)
+class TaskAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'finished_at', 'locked_by')
+    list_filter = ('status', 'name')
+    search_fields = ('idempotency_key',)
+    readonly_fields = ('attempts', 'locked_by', 'locked_until', 'last_error', 'created_at', 'finished_at')
 
 # Register models
 admin.site.register(User, CustomUserAdmin)
@@ -51,3 +116,5 @@ admin.site.register(Librarian, LibrarianAdmin)
 admin.site.register(Student, StudentAdmin)
 admin.site.register(Book, BookAdmin)
 admin.site.register(Loan, LoanAdmin)
+admin.site.register(LoanArchive, LoanArchiveAdmin)
+admin.site.register(Task, TaskAdmin)
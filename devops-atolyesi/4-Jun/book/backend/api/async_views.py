@@ -0,0 +1,136 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aauthenticate, alogin
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from . import db_router, throttling
+from .authentication import CachedTokenAuthentication
+from .hashers import HashingBusy
+from .models import Book, Loan
+from .serializers import BookSerializer, LoanSerializer
+
+auth_logger = logging.getLogger('api.auth')
+
+
+# ------------------------------
+# Async read endpoints (served natively under ASGI)
+# - Same payloads as the DRF views, without pinning a worker thread
+# ------------------------------
+async def _authenticated_user(request):
+    scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'token' or not key.strip():
+        return None
+    try:
+        user, _ = await CachedTokenAuthentication().aauthenticate_credentials(key.strip())
+    except exceptions.AuthenticationFailed:
+        return None
+    return user
+
+
+def _unauthorized():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+
+async def health_check(request):
+    return JsonResponse({"status": "ok"})
+
+
+# Same contract as login_view; the event loop stays free while the password is hashed
+@csrf_exempt
+@require_POST
+async def login(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"detail": "JSON parse error."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"detail": "Expected a JSON object."}, status=400)
+
+    # Same buckets as login_view (the shared tier is a blocking call)
+    drf_request = Request(request, parsers=[JSONParser()])
+    wait = await sync_to_async(throttling.throttle_wait)(
+        drf_request, [throttle_class() for throttle_class in throttling.LOGIN_THROTTLES],
+    )
+    if wait is not None:
+        response = JsonResponse({"detail": f"Request was throttled. Expected available in {wait} seconds."}, status=429)
+        response['Retry-After'] = str(wait)
+        return response
+
+    try:
+        user = await aauthenticate(request, username=data.get('email'), password=data.get('password'))
+    except HashingBusy as e:
+        response = JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+        response['Retry-After'] = str(e.wait)
+        return response
+    await sync_to_async(throttling.record_login)(drf_request, succeeded=user is not None)
+
+    if user is None:
+        auth_logger.warning("login failed", extra={'email': data.get('email')})
+        return JsonResponse({"error": "Invalid credentials"}, status=400)
+
+    auth_logger.info("login succeeded", extra={'user_id': user.pk})
+    await alogin(request, user)
+    token, _ = await Token.objects.aget_or_create(user=user)
+    await db_router.apin(token.key)
+    return JsonResponse({
+        'token': token.key,
+        'user_id': user.pk,
+        'email': user.email,
+        'role': user.role
+    })
+
+
+async def book_list(request):
+    """Books in id order; ?after=<id> returns the next page."""
+    if await _authenticated_user(request) is None:
+        return _unauthorized()
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    queryset = Book.objects.order_by('id')
+    after = request.GET.get('after')
+    if after:
+        if not after.isdigit():
+            return JsonResponse({"after": ["A valid integer is required."]}, status=400)
+        queryset = queryset.filter(id__gt=int(after))
+
+    serializer = BookSerializer()
+    results = [serializer.to_representation(book) async for book in queryset[:page_size]]
+    next_url = None
+    if len(results) == page_size:
+        next_url = request.build_absolute_uri(f"{request.path}?after={results[-1]['id']}")
+    return JsonResponse({"next": next_url, "results": results})
+
+
+async def book_detail(request, pk):
+    if await _authenticated_user(request) is None:
+        return _unauthorized()
+    try:
+        book = await Book.objects.aget(pk=pk)
+    except Book.DoesNotExist:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(BookSerializer(book).data)
+
+
+async def my_loans(request):
+    user = await _authenticated_user(request)
+    if user is None:
+        return _unauthorized()
+    if user.role != 'student':
+        return JsonResponse({"detail": "Only students have loans."}, status=403)
+
+    serializer = LoanSerializer()
+    queryset = serializer.setup_eager_loading(
+        Loan.objects.filter(student__user=user).order_by('-created_at', '-id'),
+        restrict_columns=True
+    )
+    results = [serializer.to_representation(loan) async for loan in queryset.aiterator()]
+    return JsonResponse(results, safe=False)
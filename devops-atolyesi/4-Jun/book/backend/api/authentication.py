@@ -0,0 +1,142 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class LRUTTLCache:
+    """Small thread-safe in-process cache with LRU eviction and a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ------------------------------
+# Token cache tiers
+# - Local: per process, holds the token with its user. Each entry remembers
+#   the shared generation it was stored under and is only trusted while the
+#   generation is unchanged
+# - Shared: optional Django cache alias. Holds (user_id, is_active, created)
+#   only, never the user row and its password hash
+# - Every invalidation bumps the shared generation, so a revoked token stops
+#   working in every worker on its next request (at the cost of refilling
+#   all local entries)
+# - Without a shared tier other workers cannot be told about a revocation,
+#   so the local tier is off unless TOKEN_CACHE_LOCAL_TTL is set
+# ------------------------------
+_config = settings.TOKEN_AUTH_CACHE
+local_tokens = LRUTTLCache(_config['LOCAL_MAXSIZE'], _config['LOCAL_TTL'])
+
+GENERATION_KEY = "auth-token:generation"
+
+
+def _shared_cache():
+    alias = _config['SHARED_ALIAS']
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f"auth-token:{key}"
+
+
+def _generation(shared):
+    # A missing generation starts from the clock, never from a number old entries carry
+    generation = shared.get(GENERATION_KEY)
+    if generation is None:
+        shared.add(GENERATION_KEY, time.time_ns(), None)
+        generation = shared.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_token(key):
+    local_tokens.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(key))
+        try:
+            shared.incr(GENERATION_KEY)
+        except ValueError:
+            shared.add(GENERATION_KEY, time.time_ns(), None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token/user join for recently seen keys."""
+
+    def authenticate_credentials(self, key):
+        shared = _shared_cache()
+        # Read before the token, so an invalidation racing this request outdates the entry
+        generation = _generation(shared) if shared is not None else None
+        entry = local_tokens.get(key)
+        if entry is not None and entry[0] == generation:
+            token = entry[1]
+        else:
+            token = self._shared_token(shared, key) if shared is not None else None
+            if token is None:
+                user, token = super().authenticate_credentials(key)
+                if shared is not None:
+                    shared.set(
+                        _shared_key(key), (token.user_id, user.is_active, token.created), _config['SHARED_TTL']
+                    )
+            if local_tokens.ttl > 0:
+                local_tokens.set(key, (generation, token))
+
+        # Each request gets its own copy so cached instances are never mutated
+        return copy.copy(token.user), token
+
+    def _shared_token(self, shared, key):
+        """Rebuild the token from the shared tier; one primary-key lookup for the user."""
+        cached = shared.get(_shared_key(key))
+        if cached is None:
+            return None
+        user_id, is_active, created = cached
+        user = get_user_model()._default_manager.filter(pk=user_id, is_active=True).first() if is_active else None
+        if user is None:
+            # Let the regular lookup raise its usual error
+            return None
+        return self.get_model()(key=key, user=user, created=created)
+
+    async def aauthenticate_credentials(self, key):
+        # Local hits stay on the event loop; misses go through the sync path
+        entry = local_tokens.get(key)
+        if entry is not None:
+            shared = _shared_cache()
+            generation = await shared.aget(GENERATION_KEY) if shared is not None else None
+            if entry[0] == generation:
+                return copy.copy(entry[1].user), entry[1]
+        return await sync_to_async(self.authenticate_credentials)(key)
@@ -0,0 +1,278 @@
+import codecs
+import csv
+import json
+from contextlib import nullcontext
+
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .hashers import hash_many, hash_process_pool
+from .models import Book, Student, User
+from .response_cache import invalidate_on_commit
+from .search import index_books
+from .services import HAS_FREE_COPY
+from .utils import iterate_in_chunks
+
+FORMATS = ('csv', 'ndjson')
+
+
+# ------------------------------
+# Streaming readers
+# - Input is consumed line by line, never loaded whole
+# - Yields (line_number, row) or (line_number, error message)
+# ------------------------------
+def read_rows(stream, fmt):
+    lines = codecs.iterdecode(iter(stream), 'utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # An empty cell means "not given", not an empty value
+            yield reader.line_num, {key: value for key, value in row.items() if value != ''}
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Each line must be a JSON object."
+            continue
+        yield line_number, row
+
+
+def format_from_name(name, default='ndjson'):
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return default
+
+
+# ------------------------------
+# Book catalog import
+# ------------------------------
+class BookImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    author = serializers.CharField(max_length=100)
+    copies_total = serializers.IntegerField(min_value=1, required=False)
+
+
+def _upsert_books(batch):
+    """Upsert on (title, author); copies_total is only overwritten when given."""
+    rows = {(row['title'], row['author']): row for row in batch}
+    existing = set(Book.objects.filter(title__in={title for title, _ in rows}).values_list('title', 'author'))
+
+    with_copies, without_copies = [], []
+    for (title, author), row in rows.items():
+        if 'copies_total' in row:
+            with_copies.append(Book(title=title, author=author, copies_total=row['copies_total']))
+        else:
+            without_copies.append(Book(title=title, author=author))
+
+    with transaction.atomic():
+        for books, update_fields in ((with_copies, ['copies_total', 'updated_at']), (without_copies, ['updated_at'])):
+            if books:
+                Book.objects.bulk_create(
+                    books,
+                    update_conflicts=True,
+                    unique_fields=['title', 'author'],
+                    update_fields=update_fields,
+                )
+        titles = {title for title, _ in rows}
+        if with_copies:
+            Book.objects.filter(title__in=titles).update(is_available=HAS_FREE_COPY)
+        # bulk_create skips signals, so index the new rows here
+        created = [key for key in rows if key not in existing]
+        if created:
+            index_books(Book.objects.filter(title__in={title for title, _ in created}))
+        invalidate_on_commit('books')
+    return len(created), len(rows) - len(created)
+
+
+def import_books(rows, batch_size=1000):
+    """Validate and upsert rows from read_rows(); returns a report dict."""
+    report = {'rows': 0, 'created': 0, 'updated': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        created, updated = _upsert_books(batch)
+        report['created'] += created
+        report['updated'] += updated
+        batch.clear()
+
+    for line_number, row in rows:
+        report['rows'] += 1
+        if isinstance(row, str):
+            report['errors'].append({'line': line_number, 'errors': {'non_field_errors': [row]}})
+            continue
+        serializer = BookImportSerializer(data=row)
+        if not serializer.is_valid():
+            report['errors'].append({'line': line_number, 'errors': serializer.errors})
+            continue
+        batch.append(serializer.validated_data)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+# ------------------------------
+# Student registration import
+# - Emails and student numbers are checked against the rest of the file with
+#   sets, and against the database once per batch, never per row
+# - Passwords are hashed in a process pool; a batch's users, students and
+#   group links are inserted in one transaction
+# - Rows without a password get an unusable one (reset before first login)
+# ------------------------------
+class StudentImportSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(required=False)
+    name = serializers.CharField(max_length=100)
+    student_number = serializers.CharField(max_length=20)
+    first_name = serializers.CharField(max_length=150, required=False, default='')
+    last_name = serializers.CharField(max_length=150, required=False, default='')
+
+
+def _register_students(batch, pool, student_group):
+    """Insert one batch of (line, row); returns (created, errors)."""
+    taken_emails = set(
+        User.objects.filter(email__in=[row['email'] for _, row in batch]).values_list('email', flat=True)
+    )
+    taken_numbers = set(
+        Student.objects.filter(student_number__in=[row['student_number'] for _, row in batch])
+        .values_list('student_number', flat=True)
+    )
+
+    errors, rows = [], []
+    for line, row in batch:
+        row_errors = {}
+        if row['email'] in taken_emails:
+            row_errors['email'] = ["A user with this email already exists."]
+        if row['student_number'] in taken_numbers:
+            row_errors['student_number'] = ["A student with this student number already exists."]
+        if row_errors:
+            errors.append({'line': line, 'errors': row_errors})
+        else:
+            rows.append((line, row))
+    if not rows:
+        return 0, errors
+
+    hashes = hash_many([row.get('password') for _, row in rows], pool)
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    email=row['email'],
+                    password=password,
+                    role=User.Role.STUDENT,
+                    first_name=row['first_name'],
+                    last_name=row['last_name'],
+                    is_active=True,
+                )
+                for (_, row), password in zip(rows, hashes)
+            ])
+            # MySQL does not return primary keys from bulk inserts
+            user_ids = dict(
+                User.objects.filter(email__in=[row['email'] for _, row in rows]).values_list('email', 'id')
+            )
+            Student.objects.bulk_create([
+                Student(user_id=user_ids[row['email']], name=row['name'], student_number=row['student_number'])
+                for _, row in rows
+            ])
+            if student_group is not None:
+                membership = User.groups.through
+                membership.objects.bulk_create([
+                    membership(user_id=user_id, group_id=student_group.pk) for user_id in user_ids.values()
+                ])
+    except IntegrityError:
+        # Someone registered one of these between the check and the insert
+        errors.extend(
+            {'line': line, 'errors': {'non_field_errors': ["Conflicts with a concurrent registration; retry."]}}
+            for line, _ in rows
+        )
+        return 0, errors
+    return len(rows), errors
+
+
+def import_students(rows, batch_size=1000, processes=None):
+    """Validate and register rows from read_rows(); returns a report dict.
+
+    Passwords are hashed on `processes` forked processes, or on the shared
+    hashing threads without it (web requests).
+    """
+    report = {'rows': 0, 'created': 0, 'errors': []}
+    seen_emails, seen_numbers = set(), set()
+    student_group = Group.objects.filter(name='student').first()
+    batch = []
+
+    with hash_process_pool(processes) if processes else nullcontext() as pool:
+        def flush():
+            created, errors = _register_students(batch, pool, student_group)
+            report['created'] += created
+            report['errors'].extend(errors)
+            batch.clear()
+
+        for line_number, row in rows:
+            report['rows'] += 1
+            if isinstance(row, str):
+                report['errors'].append({'line': line_number, 'errors': {'non_field_errors': [row]}})
+                continue
+            serializer = StudentImportSerializer(data=row)
+            if not serializer.is_valid():
+                report['errors'].append({'line': line_number, 'errors': serializer.errors})
+                continue
+
+            data = serializer.validated_data
+            data['email'] = User.objects.normalize_email(data['email'])
+            duplicates = {}
+            if data['email'].lower() in seen_emails:
+                duplicates['email'] = ["Duplicate email in this file."]
+            if data['student_number'] in seen_numbers:
+                duplicates['student_number'] = ["Duplicate student number in this file."]
+            if duplicates:
+                report['errors'].append({'line': line_number, 'errors': duplicates})
+                continue
+            seen_emails.add(data['email'].lower())
+            seen_numbers.add(data['student_number'])
+
+            batch.append((line_number, data))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
+
+
+# ------------------------------
+# Book catalog export
+# ------------------------------
+EXPORT_FIELDS = ('id', 'title', 'author', 'is_available')
+
+
+class _Echo:
+    """File-like object whose write() returns the data, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_books(fmt, chunk_size=2000):
+    books = iterate_in_chunks(Book.objects.only(*EXPORT_FIELDS), chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for book in books:
+            yield writer.writerow([getattr(book, field) for field in EXPORT_FIELDS])
+        return
+
+    for book in books:
+        yield json.dumps({field: getattr(book, field) for field in EXPORT_FIELDS}, ensure_ascii=False) + '\n'
@@ -0,0 +1,86 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Reads use a replica only inside use_replicas(); writes, commands and
+# anything outside a routed request stay on the primary
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def use_primary():
+    return use_replicas(False)
+
+
+# ------------------------------
+# Read-your-writes pins
+# - A client that wrote reads from the primary for READ_YOUR_WRITES['SECONDS']
+# - Clients are told apart by API token, session cookie or address (hashed)
+# - Login also pins the token it issues: the next request authenticates
+#   with it, not with the cookie or address the login came from
+# ------------------------------
+def client_credential(request):
+    _, _, key = request.headers.get('Authorization', '').partition(' ')
+    return (
+        key.strip()
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+
+
+def _pin(credential):
+    return caches[settings.READ_YOUR_WRITES['CACHE_ALIAS']], 'db-pin:' + hashlib.sha1(credential.encode()).hexdigest()
+
+
+def pin(credential):
+    if settings.DATABASE_REPLICAS:
+        cache, key = _pin(credential)
+        cache.set(key, 1, settings.READ_YOUR_WRITES['SECONDS'])
+
+
+async def apin(credential):
+    if settings.DATABASE_REPLICAS:
+        cache, key = _pin(credential)
+        await cache.aset(key, 1, settings.READ_YOUR_WRITES['SECONDS'])
+
+
+def is_pinned(credential):
+    cache, key = _pin(credential)
+    return cache.get(key) is not None
+
+
+async def ais_pinned(credential):
+    cache, key = _pin(credential)
+    return await cache.aget(key) is not None
+
+
+class PrimaryReplicaRouter:
+    """Writes and migrations go to 'default'; reads to a random replica when allowed."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _read_from_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db == 'default'
@@ -0,0 +1,168 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    """Every hashing slot is taken; DRF answers 503 with Retry-After."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ins right now, please retry shortly."
+    default_code = 'hashing_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+# ------------------------------
+# Hashing pool
+# - At most PASSWORD_HASH_WORKERS hashes run at once (about one per core), so
+#   a login burst cannot starve the threads serving other requests
+# - Up to PASSWORD_HASH_BACKLOG more wait for a slot; beyond that callers are
+#   turned away at once, with a Retry-After based on the recent hash time
+# - The hash libraries release the GIL, so the workers run in parallel
+# ------------------------------
+class HashPool:
+    def __init__(self, workers, backlog):
+        self.workers = workers
+        self.capacity = workers + backlog
+        self.in_flight = 0
+        self.average = 0.1  # seconds per hash, moving average
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        # Threads do not survive a fork, so each worker process builds its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+        return self._executor
+
+    def _timed(self, fn, *args, **kwargs):
+        self._local.inside = True
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.average = 0.9 * self.average + 0.1 * elapsed
+
+    def retry_after(self):
+        return max(1, math.ceil(self.in_flight * self.average / self.workers))
+
+    def _counted(self, fn, *args):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._timed(fn, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def map(self, fn, items):
+        """[fn(item) for item in items] on the pool, for batches (bulk registration).
+
+        Never turned away, but at most half the workers (at least one) take
+        batch items at a time, so sign-ins queued meanwhile still get slots.
+        """
+        window = max(1, self.workers // 2)
+        executor = self._get_executor()
+        pending = deque()
+        results = []
+        for item in items:
+            if len(pending) >= window:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(self._counted, fn, item))
+        results.extend(future.result() for future in pending)
+        return results
+
+    def run(self, fn, *args, **kwargs):
+        # Hashers call each other (verify -> encode); only the outer call is queued
+        if getattr(self._local, 'inside', False):
+            return fn(*args, **kwargs)
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                raise HashingBusy(self.retry_after())
+            self.in_flight += 1
+        try:
+            return self._get_executor().submit(self._timed, fn, *args, **kwargs).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+hash_pool = HashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_BACKLOG)
+
+
+# ------------------------------
+# Bulk hashing (student imports)
+# - Web requests share the process's hash_pool threads; forking a process
+#   pool inside a threaded server worker is not safe
+# - The import_students command forks a process pool: forked workers
+#   inherit the configured Django settings, and each is its own pool, so
+#   hashes skip the thread pool there
+# ------------------------------
+def _hash_in_worker(password):
+    hash_pool._local.inside = True
+    return hashers.make_password(password)
+
+
+def hash_process_pool(processes=None):
+    # Load the hasher (and its C library) before forking
+    hashers.get_hasher()
+    return ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork'))
+
+
+def hash_many(passwords, pool=None):
+    """make_password() for each password, spread over `pool`'s processes or, without one, hash_pool."""
+    passwords = list(passwords)
+    if pool is None:
+        return hash_pool.map(hashers.make_password, passwords)
+    chunksize = max(1, len(passwords) // (4 * (os.cpu_count() or 1)))
+    return list(pool.map(_hash_in_worker, passwords, chunksize=chunksize))
+
+
+class OffloadedHasherMixin:
+    def encode(self, password, salt, *args, **kwargs):
+        return hash_pool.run(super().encode, password, salt, *args, **kwargs)
+
+    def verify(self, password, encoded):
+        return hash_pool.run(super().verify, password, encoded)
+
+
+# ------------------------------
+# Tunable hashers (settings.PASSWORD_HASHER_PARAMS)
+# - Same algorithm names as Django's, so existing hashes keep verifying;
+#   must_update() sees changed parameters and Django rehashes on login
+# ------------------------------
+_params = settings.PASSWORD_HASHER_PARAMS
+
+
+class Argon2PasswordHasher(OffloadedHasherMixin, hashers.Argon2PasswordHasher):
+    time_cost = _params['ARGON2_TIME_COST']
+    memory_cost = _params['ARGON2_MEMORY_COST']
+    parallelism = _params['ARGON2_PARALLELISM']
+
+
+class ScryptPasswordHasher(OffloadedHasherMixin, hashers.ScryptPasswordHasher):
+    work_factor = _params['SCRYPT_WORK_FACTOR']
+    block_size = _params['SCRYPT_BLOCK_SIZE']
+    parallelism = _params['SCRYPT_PARALLELISM']
+    # OpenSSL refuses anything above 32 MiB unless told otherwise
+    maxmem = 2 * 128 * work_factor * block_size * parallelism
+
+
+class PBKDF2PasswordHasher(OffloadedHasherMixin, hashers.PBKDF2PasswordHasher):
+    iterations = _params['PBKDF2_ITERATIONS']
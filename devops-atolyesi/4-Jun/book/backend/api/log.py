@@ -0,0 +1,128 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sample_rate'}
+
+SENSITIVE = re.compile(r'pass|secret|token|authorization|cookie|csrf|api_?key', re.IGNORECASE)
+REDACTED = '[REDACTED]'
+
+
+def _extras(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+# ------------------------------
+# JSON lines
+# ------------------------------
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record; `extra` fields become top-level keys."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ------------------------------
+# Filters
+# ------------------------------
+def redact(value):
+    """Copy of `value` with sensitive keys masked, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and SENSITIVE.search(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+class RedactFilter(logging.Filter):
+    """Masks sensitive keys in `extra` fields and in mapping/sequence args."""
+
+    def filter(self, record):
+        for key, value in _extras(record).items():
+            setattr(record, key, REDACTED if SENSITIVE.search(key) else redact(value))
+        if record.args:
+            record.args = redact(record.args)
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keeps a fraction of high-volume records.
+
+    The rate comes from the record's `sample_rate` extra, else from `rates`
+    keyed by logger name (parents included). Warnings and above are never
+    dropped.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def rate_for(self, record):
+        rate = getattr(record, 'sample_rate', None)
+        name = record.name
+        while rate is None and name:
+            rate = self.rates.get(name)
+            name = name.rpartition('.')[0]
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record)
+        return rate is None or random.random() < rate
+
+
+# ------------------------------
+# Non-blocking output
+# - Records are filtered and formatted in the calling thread, then handed to
+#   a bounded queue; a listener thread does the stream writes
+# - When the queue is full the record is dropped and counted, so a slow
+#   stdout never stalls a request
+# - The listener is started lazily per process (gunicorn forks workers) and
+#   flushed by logging.shutdown() at exit
+# ------------------------------
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.listener = None
+        self.dropped = 0
+        self._pid = None
+
+    def _start(self):
+        self._pid = os.getpid()
+        self.listener = logging.handlers.QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        super().close()
@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import Loan
+from api.reports import refresh_loan_summary
+from api.services import archive_returned_loans
+
+
+class Command(BaseCommand):
+    help = "Move loans returned more than --older-than days ago into the loan archive, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, required=True,
+                            help="Archive loans returned more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Loans moved per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the loans that would be archived.")
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1:
+            raise CommandError("--older-than must be at least 1 day.")
+        returned_before = timezone.localdate() - timedelta(days=options['older_than'])
+
+        if options['dry_run']:
+            count = Loan.objects.filter(is_returned=True, actual_return_date__lt=returned_before).count()
+            self.stdout.write(f"🔍 {count} loans returned before {returned_before} would be archived.")
+            return
+
+        # Count these loans into the daily summary before they leave Loan
+        refresh_loan_summary()
+
+        started = time.perf_counter()
+        total = 0
+        # Rows stay locked while their batch's transaction is open
+        longest = 0.0
+        for moved, held in archive_returned_loans(returned_before, options['batch_size'], options['pause']):
+            total += moved
+            longest = max(longest, held)
+            self.stdout.write(f"📦 Archived {total} loans... (batch transaction {held * 1000:.0f} ms)")
+        self.stdout.write(self.style.SUCCESS(
+            f"🎉 Archived {total} loans returned before {returned_before} in {time.perf_counter() - started:.2f}s,"
+            f" longest batch transaction {longest * 1000:.0f} ms."
+        ))
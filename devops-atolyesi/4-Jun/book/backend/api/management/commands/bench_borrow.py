@@ -0,0 +1,108 @@
+import os
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Count, F, Q
+
+from api.models import Book, Student, Task
+from api.services import BookUnavailable, borrow_book, return_loan
+
+TITLE_PREFIX = "Borrow benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Race --threads students borrowing and returning a few books through the loan service, "
+        "then check for double loans and report throughput. Creates and deletes its own books."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent students, each holding at most one loan.")
+        parser.add_argument('--books', type=int, default=2, help="Books to fight over.")
+        parser.add_argument('--copies', type=int, default=2, help="Copies of each book.")
+        parser.add_argument('--seconds', type=float, default=10.0, help="How long to run.")
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        students = list(Student.objects.order_by('pk')[:threads])
+        if len(students) < threads:
+            raise CommandError(f"Needs {threads} students; create some with `manage.py seed --scale {threads}`.")
+
+        Book.objects.bulk_create([
+            Book(title=f"{TITLE_PREFIX} {number}", author=f"pid {os.getpid()}", copies_total=options['copies'])
+            for number in range(options['books'])
+        ])
+        book_ids = [book.pk for book in Book.objects.filter(author=f"pid {os.getpid()}", title__startswith=TITLE_PREFIX)]
+        counts = {'borrowed': 0, 'returned': 0, 'unavailable': 0, 'errors': 0}
+        loan_ids = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads + 1)
+        deadline = None
+
+        def run(student):
+            done = {key: 0 for key in counts}
+            mine = []
+            # Each student alternates between borrowing a book and returning it
+            held = None
+            barrier.wait()
+            try:
+                while time.perf_counter() < deadline or held is not None:
+                    try:
+                        if held is None:
+                            held = borrow_book(student, random.choice(book_ids))
+                            done['borrowed'] += 1
+                            mine.append(held.pk)
+                        else:
+                            done['returned'] += return_loan(held)
+                            held = None
+                    except BookUnavailable:
+                        done['unavailable'] += 1
+                    except DatabaseError:
+                        # Deadlock victims and SQLite's whole-file locks
+                        done['errors'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in done.items():
+                        counts[key] += value
+                    loan_ids.extend(mine)
+
+        workers = [threading.Thread(target=run, args=(student,)) for student in students]
+        for worker in workers:
+            worker.start()
+        deadline = time.perf_counter() + options['seconds']
+        cpu_started, started = time.process_time(), time.perf_counter()
+        barrier.wait()
+        for worker in workers:
+            worker.join()
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+        # More open loans than copies, or a counter that disagrees with the loans
+        broken = (
+            Book.objects.filter(pk__in=book_ids)
+            .annotate(open_loans=Count('loan', filter=Q(loan__is_returned=False)))
+            .filter(Q(open_loans__gt=F('copies_total')) | ~Q(open_loans=F('copies_on_loan')))
+            .count()
+        )
+        Task.objects.filter(
+            idempotency_key__in=[f"loan-{event}:{pk}" for pk in loan_ids for event in ('created', 'returned')]
+        ).delete()
+        Book.objects.filter(pk__in=book_ids).delete()
+
+        operations = counts['borrowed'] + counts['returned']
+        self.stdout.write(
+            f"📊 {threads} threads, {len(book_ids)} books x {options['copies']} copies, {elapsed:.1f}s: "
+            f"{counts['borrowed']} borrowed, {counts['returned']} returned, "
+            f"{counts['unavailable']} refused (no free copy), {counts['errors']} database errors"
+        )
+        self.stdout.write(
+            f"⚡ {operations / elapsed:.0f} borrows+returns/s, "
+            f"{operations / cpu if cpu else 0:.0f} per CPU-second of this process "
+            f"({os.cpu_count()} cores; the database's own CPU is not included)"
+        )
+        if broken:
+            raise CommandError(f"{broken} books ended with more open loans than copies or a wrong counter.")
+        self.stdout.write(self.style.SUCCESS("🎉 No double loans: every book's open loans fit its copies and counter."))
@@ -0,0 +1,71 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from api.hashers import HashingBusy, hash_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a login's password check with each hasher profile at the configured cost: "
+        "logins per second per core, and through the hashing pool with --threads callers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0, help="How long to time each profile.")
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1,
+                            help="Concurrent logins for the pool measurement.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"🧮 {os.cpu_count()} cores, PASSWORD_HASH_WORKERS={settings.PASSWORD_HASH_WORKERS}, "
+            f"active profile: {settings.PASSWORD_HASHER_PROFILE}"
+        )
+        for path in settings.PASSWORD_HASHERS:
+            hasher = import_string(path)()
+            try:
+                encoded = hasher.encode('correct horse battery', hasher.salt())
+            except ValueError as e:
+                # Hash library not installed (argon2-cffi)
+                self.stdout.write(self.style.WARNING(f"⏭️ {hasher.algorithm}: {e}"))
+                continue
+            cost = ', '.join(
+                f"{name}={value}" for name, value in hasher.decode(encoded).items()
+                if name not in ('algorithm', 'hash', 'salt', 'params', 'version')
+            )
+
+            # One caller: CPU time per check is the cost on one core
+            checks, cpu_started, started = 0, time.process_time(), time.perf_counter()
+            while time.perf_counter() - started < options['seconds']:
+                hasher.verify('correct horse battery', encoded)
+                checks += 1
+            per_check = (time.process_time() - cpu_started) / checks
+
+            # Many callers through hash_pool, as during a login burst
+            def check(_):
+                try:
+                    return hasher.verify('correct horse battery', encoded)
+                except HashingBusy:
+                    return None
+
+            pool_checks, refused, started = 0, 0, time.perf_counter()
+            with ThreadPoolExecutor(options['threads']) as callers:
+                while time.perf_counter() - started < options['seconds']:
+                    results = list(callers.map(check, range(options['threads'])))
+                    pool_checks += sum(result is not None for result in results)
+                    refused += results.count(None)
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"🔑 {hasher.algorithm} ({cost}): {per_check * 1000:.1f} ms CPU per login, "
+                f"{1 / per_check:.1f} logins/s per core; "
+                f"{options['threads']} callers through the pool: {pool_checks / elapsed:.1f} logins/s"
+                + (f", {refused} turned away (503)" if refused else "")
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"🎉 Done (pool: {hash_pool.workers} workers, {hash_pool.capacity - hash_pool.workers} backlog)."
+        ))
@@ -0,0 +1,126 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client
+
+from api.models import Book
+
+
+class Command(BaseCommand):
+    help = ("Prepare a container in one process: wait for the database, migrate only if needed, "
+            "seed an empty catalog and report where startup time went.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60.0, help="Seconds to wait for the database.")
+        parser.add_argument('--skip-seed', action='store_true')
+        parser.add_argument('--skip-warmup', action='store_true', help="Do not time a first request.")
+        parser.add_argument('--wait-for-migrations', action='store_true',
+                            help="Wait (up to --timeout) for another container to migrate instead of migrating.")
+
+    def handle(self, *args, **options):
+        from library import startup
+
+        self.steps = []
+        handle_started = time.perf_counter()
+
+        self.step("wait for database", self.wait_for_database, options['timeout'])
+        if options['wait_for_migrations']:
+            self.step("wait for migrations", self.wait_for_migrations, options['timeout'])
+        else:
+            self.step("migrations", self.migrate_if_needed)
+        if not options['skip_seed']:
+            self.step("seed", self.seed_if_empty)
+        if not options['skip_warmup']:
+            self.step("first request (/api/health/)", self.first_request)
+
+        self.report(startup, handle_started)
+
+    def step(self, label, func, *args):
+        started = time.perf_counter()
+        note = func(*args)
+        self.steps.append((label, time.perf_counter() - started, note))
+
+    # ------------------------------
+    # Steps
+    # ------------------------------
+    def wait_for_database(self, timeout):
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                connection.ensure_connection()
+                return f"{attempts} attempt(s)"
+            except OperationalError as e:
+                connection.close()
+                if time.monotonic() + delay > deadline:
+                    raise CommandError(f"Database not reachable after {timeout:.0f}s: {e}")
+                self.stdout.write(f"🔁 Waiting for DB ({e.__class__.__name__}), retry in {delay:.1f}s...")
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    def pending_migrations(self):
+        executor = MigrationExecutor(connection)
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+    def wait_for_migrations(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            plan = self.pending_migrations()
+            if not plan:
+                return "up to date"
+            if time.monotonic() + 2 > deadline:
+                raise CommandError(f"{len(plan)} migration(s) still pending after {timeout:.0f}s.")
+            self.stdout.write(f"🔁 Waiting for {len(plan)} migration(s) to be applied...")
+            time.sleep(2)
+
+    def migrate_if_needed(self):
+        plan = self.pending_migrations()
+        if not plan:
+            return "up to date"
+        self.stdout.write(f"🚀 Applying {len(plan)} migration(s)...")
+        try:
+            call_command('migrate', interactive=False, verbosity=0)
+        except Exception as e:
+            self.stdout.write(f"⚠️ Migration failed ({e}). Retrying with --fake-initial...")
+            call_command('migrate', interactive=False, fake_initial=True, verbosity=0)
+        return f"applied {len(plan)}"
+
+    def seed_if_empty(self):
+        if Book.objects.exists():
+            return "skipped, catalog has data"
+        call_command('seed', stdout=self.stdout)
+        return "seeded"
+
+    def first_request(self):
+        hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+        response = Client(HTTP_HOST=hosts[0] if hosts else 'localhost').get('/api/health/')
+        return f"HTTP {response.status_code}"
+
+    # ------------------------------
+    # Report
+    # ------------------------------
+    def report(self, startup, handle_started):
+        def row(label, seconds, note=None):
+            line = f"   {label:<44}{seconds * 1000:>10.1f} ms"
+            return f"{line}  ({note})" if note else line
+
+        lines = ["⏱️ Startup breakdown"]
+        if startup.timings:
+            settings_module = settings.SETTINGS_MODULE
+            lines.append(row(f"settings ({settings_module})", startup.timings.get(settings_module, 0)))
+            for app in settings.INSTALLED_APPS:
+                package = app.rsplit('.apps.', 1)[0]
+                spent = startup.timings.get(package, 0) + startup.timings.get(f'{package}.models', 0)
+                lines.append(row(f"import {package}", spent))
+            lines.append(row("manage.py start -> command ready", handle_started - startup.STARTED))
+        for label, spent, note in self.steps:
+            lines.append(row(label, spent, note))
+        lines.append(row("total", time.perf_counter() - startup.STARTED))
+        self.stdout.write("\n".join(lines))
+        self.stdout.write(self.style.SUCCESS("🎉 Bootstrap complete."))
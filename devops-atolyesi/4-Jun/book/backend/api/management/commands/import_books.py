@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import bulk
+
+
+class Command(BaseCommand):
+    help = "Stream-import books from a CSV or NDJSON file, upserting on (title, author)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (title,author header) or NDJSON file.")
+        parser.add_argument('--format', choices=bulk.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or bulk.format_from_name(options['path'], default=None)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = bulk.import_books(bulk.read_rows(stream, fmt), options['batch_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"❌ line {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"📚 {report['rows']} rows: {report['created']} created, "
+            f"{report['updated']} updated, {len(report['errors'])} errors."
+        ))
@@ -0,0 +1,92 @@
+import json
+import re
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from api.urls import router
+
+User = get_user_model()
+
+# Plan fragments that mean "every row is read"
+FULL_SCAN_PATTERNS = {
+    'mysql': re.compile(r'"access_type":\s*"ALL"'),
+    'sqlite': re.compile(r'\bSCAN \w+\b(?! USING (COVERING )?INDEX)'),
+    'postgresql': re.compile(r'Seq Scan'),
+}
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on every API ViewSet and admin changelist queryset and flag full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--search', default='a', help="Term used to explain admin search queries.")
+        parser.add_argument('--show-plans', action='store_true', help="Print the full plan of each query.")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if a full scan is found.")
+
+    def handle(self, *args, **options):
+        self.show_plans = options['show_plans']
+        self.full_scans = []
+        factory = RequestFactory()
+
+        # ✅ API ViewSets, explained as each role that can list them
+        users = [
+            user for user in (
+                User.objects.filter(role='admin').first(),
+                User.objects.filter(role='student').first(),
+            ) if user is not None
+        ]
+        for prefix, viewset, _ in router.registry:
+            for user in users:
+                view = viewset(action='list', format_kwarg=None, args=(), kwargs={})
+                view.request = Request(factory.get(f'/api/{prefix}/'))
+                view.request.user = user
+                if not all(p.has_permission(view.request, view) for p in view.get_permissions()):
+                    continue
+                queryset = view.filter_queryset(view.get_queryset())
+                paginator = view.paginator
+                if paginator is not None and getattr(paginator, 'ordering', None):
+                    queryset = queryset.order_by(*paginator.ordering)[:paginator.page_size]
+                self.explain(f"{viewset.__name__}.list as {user.role}", queryset)
+
+        # ✅ Admin changelist pages and their search
+        request = factory.get('/admin/')
+        request.user = User(is_superuser=True, is_staff=True, is_active=True)
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'api':
+                continue
+            queryset = model_admin.get_queryset(request)
+            ordering = model_admin.get_ordering(request) or ('-pk',)
+            page = slice(0, model_admin.list_per_page)
+            self.explain(f"{type(model_admin).__name__} changelist", queryset.order_by(*ordering)[page])
+            if model_admin.search_fields:
+                queryset, _ = model_admin.get_search_results(request, queryset, options['search'])
+                self.explain(f"{type(model_admin).__name__} search", queryset.order_by(*ordering)[page])
+
+        if self.full_scans:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(self.full_scans)} queries read the whole table."))
+            if options['fail_on_scan']:
+                raise CommandError("Full table scans found: " + ", ".join(self.full_scans))
+        else:
+            self.stdout.write(self.style.SUCCESS("🎉 No full table scans found."))
+
+    def explain(self, label, queryset):
+        if connection.vendor == 'mysql':
+            plan = queryset.explain(format='json')
+            plan = json.dumps(json.loads(plan), indent=2)
+        else:
+            plan = queryset.explain()
+
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is not None and pattern.search(plan):
+            self.full_scans.append(label)
+            self.stdout.write(self.style.ERROR(f"❌ FULL SCAN  {label}"))
+        else:
+            self.stdout.write(f"✅ ok         {label}")
+
+        if self.show_plans:
+            self.stdout.write(plan)
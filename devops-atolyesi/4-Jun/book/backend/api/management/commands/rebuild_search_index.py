@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from api.models import Book
+from api.search import index_books
+
+
+class Command(BaseCommand):
+    help = "Rebuild the book search index, fully or only for books updated since a given time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="ISO datetime; only reindex books updated after it.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Book.objects.all()
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError("--since must be an ISO datetime, e.g. 2025-06-01T00:00:00+03:00")
+            queryset = queryset.filter(updated_at__gte=since)
+
+        count = index_books(queryset, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"🔎 Reindexed {count} books."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Book
+from api.services import reconcile_book_counters
+
+
+class Command(BaseCommand):
+    help = "Check Book.copies_on_loan against open loans in batches, optionally fixing drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Write the counted values back.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatches = 0
+        for book, recorded, counted in reconcile_book_counters(Book.objects.all(), options['fix'], options['batch_size']):
+            mismatches += 1
+            self.stdout.write(f"⚠️ Book {book.pk} ({book.title}): copies_on_loan={recorded}, open loans={counted}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("🎉 All book counters match their open loans."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"🔧 Fixed {mismatches} book counters."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{mismatches} book counters are off. Run with --fix to correct them."))
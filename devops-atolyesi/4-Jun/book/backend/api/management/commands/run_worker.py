@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import tasks
+
+
+class Command(BaseCommand):
+    help = ("Run queued background tasks (notifications, overdue sweeps, report refreshes) "
+            "in a pool of worker processes until stopped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.TASKS['WORKER_PROCESSES'],
+                            help="Worker processes.")
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds an idle worker waits between checks.")
+        parser.add_argument('--once', action='store_true',
+                            help="Run the tasks that are due in this process, then exit (for cron).")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            tasks.requeue_expired()
+            tasks.schedule_periodic()
+            done = tasks.work()
+            self.stdout.write(self.style.SUCCESS(f"✅ Ran {done} task(s)."))
+            return
+
+        # Setting the Event from a signal handler can deadlock with a wait() in
+        # progress, so the handler only flips a flag
+        self.stopping = False
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.request_stop)
+
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        workers = {}
+        self.stdout.write(f"👷 Starting {options['processes']} worker(s)...")
+        while not self.stopping:
+            # Housekeeping runs in the supervisor, once a minute
+            tasks.requeue_expired()
+            tasks.schedule_periodic()
+            # Children must not share this process's database connection
+            connections.close_all()
+            for slot in range(options['processes']):
+                process = workers.get(slot)
+                if process is not None and process.is_alive():
+                    continue
+                if process is not None:
+                    self.stdout.write(self.style.WARNING(f"⚠️ Worker {process.pid} exited ({process.exitcode}), restarting."))
+                workers[slot] = context.Process(target=_work, args=(stop, options['poll']), daemon=True)
+                workers[slot].start()
+            for _ in range(60):
+                if self.stopping:
+                    break
+                time.sleep(1)
+
+        # Each worker finishes its current task, then exits
+        self.stdout.write("🛑 Stopping, waiting for running tasks...")
+        stop.set()
+        for process in workers.values():
+            process.join()
+        self.stdout.write(self.style.SUCCESS("✅ Workers stopped."))
+
+    def request_stop(self, signum, frame):
+        self.stopping = True
+
+
+def _work(stop, poll):
+    # Ctrl-C reaches the whole process group; only the supervisor reacts to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        tasks.work(stop, poll)
+    finally:
+        connections.close_all()
@@ -1,46 +1,87 @@
+import random
+import time
+
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.utils.timezone import now
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
 
 from api.models import Book, Loan, Student, Librarian
+from api.response_cache import invalidate_on_commit
+from api.search import index_books
+from api.services import reconcile_book_counters
 from datetime import timedelta
 
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = "Seed initial users, groups, and sample data only if they do not exist."
+    help = "Seed initial users, groups, and sample data only if they do not exist. Use --scale N for synthetic load-test data."
 
-    def handle(self, *args, **kwargs):
-        def create_group_with_permissions(name, model_perms):
-            group, _ = Group.objects.get_or_create(name=name)
-            for model, perms in model_perms.items():
-                content_type = ContentType.objects.get_for_model(model)
-                for codename in perms:
-                    perm = Permission.objects.get(content_type=content_type, codename=codename)
-                    group.permissions.add(perm)
-            return group
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=0,
+                            help="Also generate N synthetic students, N books and N loans.")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk INSERT when generating synthetic data.")
+
+    def handle(self, *args, **options):
+        # One hash per distinct password instead of one per user
+        password_hashes = {}
+
+        def hashed(password):
+            if password not in password_hashes:
+                password_hashes[password] = make_password(password)
+            return password_hashes[password]
+
+        with transaction.atomic():
+            groups = self.seed_groups()
+            self.seed_sample_data(groups, hashed)
+            if options['scale'] > 0:
+                self.seed_synthetic_data(options['scale'], options['batch_size'], groups, hashed)
+
+        self.stdout.write(self.style.SUCCESS("🎉 Seed completed successfully with tokens and group assignments."))
+
+    def seed_groups(self):
+        group_perms = {
+            "admin": {
+                Book: ["add_book", "change_book", "delete_book", "view_book"],
+                Loan: ["add_loan", "change_loan", "delete_loan", "view_loan"],
+                Student: ["add_student", "change_student", "delete_student", "view_student"],
+            },
+            "librarian": {
+                Book: ["add_book", "change_book", "delete_book", "view_book"],
+                Loan: ["add_loan", "change_loan", "delete_loan", "view_loan"],
+                Student: ["add_student", "change_student", "view_student"],
+            },
+            "student": {
+                Book: ["view_book"],
+                Loan: ["view_loan"],
+            },
+        }
+
+        # ✅ All permissions resolved in one query
+        content_types = ContentType.objects.get_for_models(Book, Loan, Student)
+        permissions = {
+            (perm.content_type_id, perm.codename): perm
+            for perm in Permission.objects.filter(content_type__in=content_types.values())
+        }
 
         # ✅ Groups
-        admin_group = create_group_with_permissions("admin", {
-            Book: ["add_book", "change_book", "delete_book", "view_book"],
-            Loan: ["add_loan", "change_loan", "delete_loan", "view_loan"],
-            Student: ["add_student", "change_student", "delete_student", "view_student"],
-        })
-
-        librarian_group = create_group_with_permissions("librarian", {
-            Book: ["add_book", "change_book", "delete_book", "view_book"],
-            Loan: ["add_loan", "change_loan", "delete_loan", "view_loan"],
-            Student: ["add_student", "change_student", "view_student"],
-        })
-
-        student_group = create_group_with_permissions("student", {
-            Book: ["view_book"],
-            Loan: ["view_loan"],
-        })
+        groups = {}
+        for name, model_perms in group_perms.items():
+            group, _ = Group.objects.get_or_create(name=name)
+            group.permissions.add(*[
+                permissions[(content_types[model].id, codename)]
+                for model, codenames in model_perms.items()
+                for codename in codenames
+            ])
+            groups[name] = group
+        return groups
 
+    def seed_sample_data(self, groups, hashed):
         def create_user(email, password, first, last, role="student", is_staff=False, is_superuser=False):
             user, created = User.objects.get_or_create(
                 email=email,
@@ -51,20 +92,19 @@ class Command(BaseCommand):
                     "is_active": True,
                     "is_staff": is_staff,
                     "is_superuser": is_superuser,
+                    "password": hashed(password),
                 },
             )
             if created:
-                user.set_password(password)
-                user.save()
                 self.stdout.write(f"✅ Created user: {email}")
             if role == "librarian":
                 Librarian.objects.get_or_create(user=user, defaults={"name": f"{first} {last}", "employee_number": "EMP999"})
-                user.groups.add(librarian_group)
+                user.groups.add(groups["librarian"])
             elif role == "student":
                 Student.objects.get_or_create(user=user, defaults={"name": f"{first} {last}", "student_number": "STU999"})
-                user.groups.add(student_group)
+                user.groups.add(groups["student"])
             elif is_superuser:
-                user.groups.add(admin_group)
+                user.groups.add(groups["admin"])
             Token.objects.get_or_create(user=user)
             return user
 
@@ -90,34 +130,33 @@ class Command(BaseCommand):
                     "first_name": first,
                     "last_name": last,
                     "role": role,
-                    "is_active": True
+                    "is_active": True,
+                    "password": hashed("123456"),
                 }
             )
             if created:
-                user.set_password("123456")
-                user.save()
                 self.stdout.write(f"✅ Created sample user: {email}")
                 if role == "librarian":
                     Librarian.objects.get_or_create(user=user, defaults={"name": f"{first} {last}", "employee_number": number})
-                    user.groups.add(librarian_group)
+                    user.groups.add(groups["librarian"])
                 elif role == "student":
                     Student.objects.get_or_create(user=user, defaults={"name": f"{first} {last}", "student_number": number})
-                    user.groups.add(student_group)
+                    user.groups.add(groups["student"])
                 Token.objects.get_or_create(user=user)
 
         # ✅ Books
         books = [
-            ("The Great Gatsby", "F. Scott Fitzgerald", True),
-            ("To Kill a Mockingbird", "Harper Lee", True),
-            ("1984", "George Orwell", False),
-            ("Pride and Prejudice", "Jane Austen", True),
-            ("The Catcher in the Rye", "J.D. Salinger", True),
+            ("The Great Gatsby", "F. Scott Fitzgerald", 3),
+            ("To Kill a Mockingbird", "Harper Lee", 3),
+            ("1984", "George Orwell", 2),
+            ("Pride and Prejudice", "Jane Austen", 2),
+            ("The Catcher in the Rye", "J.D. Salinger", 2),
         ]
-        for title, author, available in books:
+        for title, author, copies in books:
             book, created = Book.objects.get_or_create(
                 title=title,
                 author=author,
-                defaults={"is_available": available}
+                defaults={"copies_total": copies}
             )
             if created:
                 self.stdout.write(f"📚 Book added: {title}")
@@ -136,16 +175,118 @@ class Command(BaseCommand):
                     (students[2], books[3]),
                     (students[0], books[4]),
                 ]
-                for student, book in loan_data:
-                    Loan.objects.create(
+                Loan.objects.bulk_create([
+                    Loan(
                         student=student,
                         book=book,
                         loan_date=now().date(),
                         return_date=now().date() + timedelta(days=14),
                         is_returned=False
                     )
+                    for student, book in loan_data
+                ])
+                # bulk_create bypasses the loan service, so count the copies here
+                list(reconcile_book_counters(Book.objects.filter(pk__in=[book.pk for _, book in loan_data]), fix=True))
                 self.stdout.write("📦 Sample loans added.")
             else:
                 self.stdout.write("⚠️ Not enough students or books to create sample loans.")
 
-        self.stdout.write(self.style.SUCCESS("🎉 Seed completed successfully with tokens and group assignments."))
+    # ------------------------------
+    # Synthetic data (--scale N)
+    # - bulk_create in batches, ids fetched back by range
+    #   (MySQL does not return primary keys from bulk inserts)
+    # ------------------------------
+    def seed_synthetic_data(self, scale, batch_size, groups, hashed):
+        rng = random.Random(scale)
+        today = now().date()
+        run = f"{int(time.time())}"
+        password = hashed("123456")
+
+        def timed_insert(label, model, rows):
+            started = time.perf_counter()
+            count = 0
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_create(batch)
+                count += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"⚡ {label}: {count} rows in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+            return count
+
+        def new_ids(model, last_id):
+            return list(model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True))
+
+        def last_id(model):
+            return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        started = time.perf_counter()
+        total = 0
+
+        # ✅ Users + student profiles + group membership
+        last_user = last_id(User)
+        total += timed_insert("users", User, (
+            User(
+                email=f"seed{run}.{i}@seed.local",
+                first_name="Seed",
+                last_name=f"Student {i}",
+                role="student",
+                is_active=True,
+                password=password,
+            )
+            for i in range(scale)
+        ))
+        user_ids = new_ids(User, last_user)
+
+        total += timed_insert("students", Student, (
+            Student(user_id=user_id, name=f"Seed Student {i}", student_number=f"S{run[-6:]}{i:09d}")
+            for i, user_id in enumerate(user_ids)
+        ))
+        membership = User.groups.through
+        total += timed_insert("student group links", membership, (
+            membership(user_id=user_id, group_id=groups["student"].id) for user_id in user_ids
+        ))
+        student_ids = list(Student.objects.filter(user_id__gt=last_user).values_list('pk', flat=True))
+
+        # ✅ Books (the first tenth is on loan)
+        on_loan = max(scale // 10, 1)
+        last_book = last_id(Book)
+        total += timed_insert("books", Book, (
+            Book(
+                title=f"Seed Book {run}-{i}", author=f"Author {i % 1000}",
+                copies_on_loan=int(i < on_loan), is_available=i >= on_loan,
+            )
+            for i in range(scale)
+        ))
+        book_ids = new_ids(Book, last_book)
+        invalidate_on_commit('books')
+
+        search_started = time.perf_counter()
+        indexed = index_books(Book.objects.filter(pk__gt=last_book), batch_size)
+        self.stdout.write(f"🔎 search index: {indexed} books in {time.perf_counter() - search_started:.2f}s")
+
+        # ✅ Loans: open loans for the books on loan, returned history for the rest
+        def loans():
+            for i in range(scale):
+                loan_date = today - timedelta(days=rng.randint(0, 365))
+                if i < on_loan:
+                    yield Loan(
+                        student_id=rng.choice(student_ids), book_id=book_ids[i],
+                        loan_date=loan_date, return_date=loan_date + timedelta(days=14),
+                        is_returned=False,
+                    )
+                else:
+                    yield Loan(
+                        student_id=rng.choice(student_ids), book_id=rng.choice(book_ids),
+                        loan_date=loan_date, return_date=loan_date + timedelta(days=14),
+                        is_returned=True, actual_return_date=loan_date + timedelta(days=rng.randint(1, 21)),
+                    )
+        total += timed_insert("loans", Loan, loans())
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"📈 Synthetic data: {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Latency histogram upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ------------------------------
+# Per-request accounting
+# - The middleware puts a RequestStats in a context variable; the DB
+#   execute wrapper and serializers add to it
+# - Context variables follow sync_to_async, so async views are covered too
+# ------------------------------
+class RequestStats:
+    __slots__ = ('started', 'sql_count', 'sql_time', 'serializer_time', 'serializer_depth', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        # SQL text (parameters are placeholders) -> executions, for N+1 detection
+        self.statements = Counter()
+
+
+current = ContextVar('request_stats', default=None)
+
+
+def track_query(execute, sql, params, many, context):
+    """Connection execute wrapper; a no-op outside of a measured request."""
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_time += time.perf_counter() - started
+        stats.sql_count += 1
+        stats.statements[sql] += 1
+
+
+# ------------------------------
+# Aggregates in Prometheus text format
+# - Each process counts its own requests
+# - With METRICS_DIR set (gunicorn sets it), every process also writes its
+#   totals to <METRICS_DIR>/<pid>.json at most once a second, and a scrape
+#   adds up all the files, so any worker answers for all of them
+# - The gunicorn master folds an exited worker's file into retired.json,
+#   so totals survive worker restarts
+# ------------------------------
+FLUSH_INTERVAL = 1.0
+RETIRED = 'retired.json'
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _empty_series():
+    return {
+        'buckets': [0] * len(BUCKETS),
+        'count': 0,
+        'sum': 0.0,
+        'sql_queries': 0,
+        'sql_seconds': 0.0,
+        'serializer_seconds': 0.0,
+        'response_bytes': 0,
+        'repeated_queries': 0,
+    }
+
+
+def _merge(snapshot, rows):
+    # rows: [[view, method, status], series] pairs, as written to the files
+    for labels, series in rows:
+        total = snapshot.setdefault(tuple(labels), _empty_series())
+        for key, value in series.items():
+            if key == 'buckets':
+                total[key] = [a + b for a, b in zip(total[key], value)]
+            else:
+                total[key] += value
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Gone since the listing (retired), or a worker that died mid-write
+        return None
+
+
+def _write(path, data):
+    # Readers only ever see a complete file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def retire(directory, pid):
+    """Fold an exited worker's totals into retired.json (gunicorn master, one at a time)."""
+    path = os.path.join(directory, f'{pid}.json')
+    rows = _read(path)
+    if rows is None:
+        return
+    retired = _read(os.path.join(directory, RETIRED)) or {'pid': None, 'rows': []}
+    snapshot = {}
+    _merge(snapshot, retired['rows'])
+    _merge(snapshot, rows)
+    rows = [[list(labels), series] for labels, series in snapshot.items()]
+    # Scrapes skip <pid>.json while it is still around, so nothing is counted twice
+    _write(os.path.join(directory, RETIRED), {'pid': pid, 'rows': rows})
+    os.remove(path)
+    # The pid may be reused by the next worker
+    _write(os.path.join(directory, RETIRED), {'pid': None, 'rows': rows})
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._flushed = 0.0
+
+    @property
+    def directory(self):
+        return settings.METRICS_DIR
+
+    def observe(self, labels, duration, stats, response_bytes, repeated):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _empty_series()
+            index = bisect_left(BUCKETS, duration)
+            if index < len(BUCKETS):
+                series['buckets'][index] += 1
+            series['count'] += 1
+            series['sum'] += duration
+            series['sql_queries'] += stats.sql_count
+            series['sql_seconds'] += stats.sql_time
+            series['serializer_seconds'] += stats.serializer_time
+            series['response_bytes'] += response_bytes or 0
+            series['repeated_queries'] += repeated
+        if self.directory and time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+    def _rows(self):
+        with self._lock:
+            return [[list(labels), dict(series, buckets=list(series['buckets']))] for labels, series in self._series.items()]
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR (no-op without it)."""
+        if not self.directory:
+            return
+        self._flushed = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        _write(os.path.join(self.directory, f'{os.getpid()}.json'), self._rows())
+
+    def collect(self):
+        """(view, method, status) -> series, summed over every process when METRICS_DIR is set."""
+        snapshot = {}
+        if not self.directory:
+            _merge(snapshot, self._rows())
+            return snapshot
+        self.flush()
+        retired = _read(os.path.join(self.directory, RETIRED)) or {'pid': None, 'rows': []}
+        _merge(snapshot, retired['rows'])
+        for name in os.listdir(self.directory):
+            if name.endswith('.json') and name not in (RETIRED, f"{retired['pid']}.json"):
+                _merge(snapshot, _read(os.path.join(self.directory, name)) or [])
+        return snapshot
+
+    def render(self):
+        snapshot = self.collect()
+
+        lines = [
+            "# HELP api_request_duration_seconds Request wall time per view.",
+            "# TYPE api_request_duration_seconds histogram",
+        ]
+        for (view, method, status), series in sorted(snapshot.items()):
+            labels = f'view="{_label_value(view)}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, series['buckets']):
+                cumulative += count
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f'api_request_duration_seconds_sum{{{labels}}} {series["sum"]:.6f}')
+            lines.append(f'api_request_duration_seconds_count{{{labels}}} {series["count"]}')
+
+        counters = (
+            ('api_db_queries_total', 'sql_queries', "SQL statements executed."),
+            ('api_db_query_seconds_total', 'sql_seconds', "Time spent in SQL statements."),
+            ('api_serializer_seconds_total', 'serializer_seconds', "Time spent serializing responses."),
+            ('api_response_bytes_total', 'response_bytes', "Response body bytes (streaming responses excluded)."),
+            ('api_repeated_queries_total', 'repeated_queries', "Statements repeated past the N+1 threshold."),
+        )
+        for name, key, help_text in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (view, method, status), series in sorted(snapshot.items()):
+                labels = f'view="{_label_value(view)}",method="{method}",status="{status}"'
+                lines.append(f'{name}{{{labels}}} {series[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
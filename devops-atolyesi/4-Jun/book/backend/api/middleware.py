@@ -0,0 +1,240 @@
+import logging
+import math
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import db_router, metrics
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def view_label(request):
+    """'BookViewSet.list', 'login_view', ... for the view that handled `request`."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        return f"{view_class.__name__}.{actions.get(request.method.lower(), request.method.lower())}"
+    return view_class.__name__
+
+
+# ------------------------------
+# Performance instrumentation
+# - Wall time, SQL count/time, serializer time and response size per view
+# - Server-Timing header on every response, aggregates at /api/metrics/
+# - A statement run N_PLUS_ONE_THRESHOLD times in one request is logged
+# ------------------------------
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        duration = time.perf_counter() - stats.started
+        view = view_label(request)
+        response_bytes = None if response.streaming else len(response.content)
+
+        repeated = 0
+        for sql, count in stats.statements.items():
+            if count >= settings.N_PLUS_ONE_THRESHOLD:
+                repeated += 1
+                logger.warning("repeated query", extra={'view': view, 'count': count, 'sql': sql[:500]})
+
+        metrics.registry.observe((view, request.method, response.status_code), duration, stats, response_bytes, repeated)
+        response['Server-Timing'] = ', '.join((
+            f'app;dur={duration * 1000:.1f}',
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"',
+            f'ser;dur={stats.serializer_time * 1000:.1f}',
+        ))
+        return response
+
+
+# ------------------------------
+# Admission control
+# - At most ADMISSION['MAX_IN_FLIGHT'] requests run at once in a process;
+#   the next ones get 429 with a Retry-After straight away instead of
+#   queueing for a database connection
+# - Matters most under ASGI, where nothing else bounds concurrency
+# ------------------------------
+class ConcurrencyLimitMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limit = settings.ADMISSION['MAX_IN_FLIGHT']
+        self.exempt = settings.ADMISSION['EXEMPT_PATHS']
+        self.in_flight = 0
+        self.average = 0.1  # seconds per request, moving average
+        self._lock = threading.Lock()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def admit(self, request):
+        if request.path in self.exempt:
+            return True
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, request, started):
+        if request.path in self.exempt:
+            return
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.average = 0.9 * self.average + 0.1 * elapsed
+
+    def reject(self, request):
+        logger.warning("request shed", extra={'path': request.path, 'in_flight': self.in_flight})
+        response = JsonResponse({"detail": "Server is busy, please retry shortly."}, status=429)
+        response['Retry-After'] = str(max(1, math.ceil(self.average)))
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.admit(request):
+            return self.reject(request)
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(request, started)
+
+    async def __acall__(self, request):
+        if not self.admit(request):
+            return self.reject(request)
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(request, started)
+
+
+# ------------------------------
+# Read replica routing
+# - Safe-method requests read from a replica unless their client is pinned
+#   to the primary (api.db_router); any other method pins its client
+# ------------------------------
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        credential = db_router.client_credential(request)
+        if request.method in SAFE_METHODS:
+            with db_router.use_replicas(not db_router.is_pinned(credential)):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        db_router.pin(credential)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        credential = db_router.client_credential(request)
+        if request.method in SAFE_METHODS:
+            with db_router.use_replicas(not await db_router.ais_pinned(credential)):
+                return await self.get_response(request)
+
+        response = await self.get_response(request)
+        await db_router.apin(credential)
+        return response
+
+
+# ------------------------------
+# Response compression
+# - Brotli when the client accepts it and the module is installed, gzip
+#   (Django's middleware) otherwise
+# - Brotli only for GET/HEAD: those responses carry no secrets, while
+#   Django's gzip pads its output against BREACH-style length probing
+# - Streaming responses always go to gzip, which compresses them chunk by chunk
+# ------------------------------
+_accepts_br = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or response.streaming
+            or request.method not in ('GET', 'HEAD')
+            or not _accepts_br.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        if len(response.content) < 200 or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:58
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of api.search.tokenize as of this migration, so later changes
+# to the tokenizer (or to api.search's imports) cannot change or break it;
+# `manage.py rebuild_search_index` re-tokenizes with the current rules
+MAX_TERM_LENGTH = 64
+TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'İ': 'i', 'I': 'i',
+    'ş': 's', 'Ş': 's',
+    'ğ': 'g', 'Ğ': 'g',
+    'ç': 'c', 'Ç': 'c',
+    'ö': 'o', 'Ö': 'o',
+    'ü': 'u', 'Ü': 'u',
+})
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', text.translate(TURKISH_FOLD).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return {token[:MAX_TERM_LENGTH] for token in re.findall(r'\w+', text)}
+
+
+def build_index(apps, schema_editor):
+    Book = apps.get_model('api', 'Book')
+    BookSearchTerm = apps.get_model('api', 'BookSearchTerm')
+    terms = []
+    for book in Book.objects.only('id', 'title', 'author').iterator(chunk_size=2000):
+        terms.extend(BookSearchTerm(term=term, book_id=book.id) for term in tokenize(f"{book.title} {book.author}"))
+        if len(terms) >= 5000:
+            BookSearchTerm.objects.bulk_create(terms)
+            terms = []
+    BookSearchTerm.objects.bulk_create(terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='api.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'book'], name='search_term_book_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:59
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import (
+    BooleanField, Case, Count, ExpressionWrapper, F, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+# Books merged per statement (each statement carries one CASE branch per book)
+BATCH_SIZE = 500
+
+
+def _chunks(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def merge_copies(apps, schema_editor):
+    """Fold duplicate (title, author) rows into one book with copy counters, a batch per statement."""
+    Book = apps.get_model('api', 'Book')
+    Loan = apps.get_model('api', 'Loan')
+
+    # Every duplicate row and the lowest id of its (title, author), which is kept
+    first = Book.objects.filter(title=OuterRef('title'), author=OuterRef('author')).order_by('id').values('id')[:1]
+    merge_map = list(
+        Book.objects.annotate(keep=Subquery(first)).exclude(id=F('keep')).values_list('id', 'keep')
+    )
+    for chunk in _chunks(merge_map):
+        Loan.objects.filter(book_id__in=[extra for extra, _ in chunk]).update(
+            book_id=Case(*[When(book_id=extra, then=Value(keep)) for extra, keep in chunk])
+        )
+        Book.objects.filter(id__in=[extra for extra, _ in chunk]).delete()
+
+    copies = list(Counter(keep for _, keep in merge_map).items())
+    for chunk in _chunks(copies):
+        Book.objects.filter(id__in=[keep for keep, _ in chunk]).update(
+            copies_total=Case(*[When(id=keep, then=Value(extras + 1)) for keep, extras in chunk])
+        )
+
+    open_loans = (
+        Loan.objects.filter(book_id=OuterRef('id'), is_returned=False)
+        .values('book_id').annotate(count=Count('id')).values('count')
+    )
+    Book.objects.update(copies_on_loan=Coalesce(Subquery(open_loans), 0))
+    Book.objects.update(
+        copies_total=Greatest('copies_total', 'copies_on_loan'),
+        is_available=ExpressionWrapper(Q(copies_on_loan__lt=F('copies_total')), output_field=BooleanField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='copies_on_loan',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='copies_total',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        # No reverse: merged rows cannot be split again, so unapplying raises IrreversibleError
+        migrations.RunPython(merge_copies),
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.UniqueConstraint(fields=('title', 'author'), name='book_title_author_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_title_author_idx',
+        ),
+    ]
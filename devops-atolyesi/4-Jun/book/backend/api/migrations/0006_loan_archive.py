@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_loan_reports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('loan_date', models.DateField()),
+                ('return_date', models.DateField(blank=True, null=True)),
+                ('actual_return_date', models.DateField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.book')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'loan_date'], name='loan_archive_student_idx'), models.Index(fields=['loan_date'], name='loan_archive_date_idx'), models.Index(fields=['actual_return_date'], name='loan_archive_returned_idx')],
+            },
+        ),
+    ]
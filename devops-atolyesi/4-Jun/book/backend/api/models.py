@@ -64,6 +64,11 @@ class Librarian(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='librarian_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -74,16 +79,61 @@ class Student(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='student_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+# True while at least one copy is not on loan, evaluated in the UPDATE itself
+HAS_FREE_COPY = models.ExpressionWrapper(
+    models.Q(copies_on_loan__lt=models.F('copies_total')),
+    output_field=models.BooleanField(),
+)
+
 class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
+    # Inventory counters, kept in step with open loans by api.services
+    copies_total = models.PositiveIntegerField(default=1)
+    copies_on_loan = models.PositiveIntegerField(default=0)
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One row per title; copies are counted, not duplicated
+            models.UniqueConstraint(fields=['title', 'author'], name='book_title_author_uniq'),
+        ]
+        indexes = [
+            # Availability checks and the available-books listing
+            models.Index(fields=['is_available', 'title'], name='book_available_title_idx'),
+            # Cursor pagination order
+            models.Index(fields=['created_at', 'id'], name='book_created_idx'),
+        ]
+
+    # The counters only change through conditional UPDATEs (api.services);
+    # an edit of a loaded row must not write back the values it read
+    COUNTER_FIELDS = ('copies_on_loan', 'is_available')
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+            self.is_available = self.copies_on_loan < self.copies_total
+            super().save(*args, **kwargs)
+            return
+
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.COUNTER_FIELDS
+        ]
+        super().save(*args, **kwargs)
+        # copies_total may have changed; recompute against the current counter
+        Book.objects.filter(pk=self.pk).update(is_available=HAS_FREE_COPY)
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+
     def __str__(self):
         return self.title
 
@@ -97,5 +147,101 @@ class Loan(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # A student's loans, optionally only the open ones
+            models.Index(fields=['student', 'is_returned', 'loan_date'], name='loan_student_returned_idx'),
+            # Open loans of a book
+            models.Index(fields=['book', 'is_returned'], name='loan_book_returned_idx'),
+            # Overdue report: open loans past their return date
+            models.Index(fields=['is_returned', 'return_date'], name='loan_overdue_idx'),
+            # Daily summary refresh: changed loans, and the days they count towards
+            models.Index(fields=['updated_at'], name='loan_updated_idx'),
+            models.Index(fields=['loan_date'], name='loan_date_idx'),
+            models.Index(fields=['actual_return_date'], name='loan_returned_date_idx'),
+            # Cursor pagination order
+            models.Index(fields=['created_at', 'id'], name='loan_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.book.title} - {self.student.name}"
+
+# Returned loans moved out of Loan by api.services.archive_returned_loans.
+# Keeps the original loan id; is_returned is implied.
+class LoanArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    loan_date = models.DateField()
+    return_date = models.DateField(null=True, blank=True)
+    actual_return_date = models.DateField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # A student's history
+            models.Index(fields=['student', 'loan_date'], name='loan_archive_student_idx'),
+            # Daily summary recounts
+            models.Index(fields=['loan_date'], name='loan_archive_date_idx'),
+            models.Index(fields=['actual_return_date'], name='loan_archive_returned_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived loan {self.id}"
+
+# Inverted index for book search (maintained by api.search)
+class BookSearchTerm(models.Model):
+    term = models.CharField(max_length=64)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='search_terms')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'book'], name='search_term_book_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+# Loans and returns per day (maintained by api.reports)
+class LoanDailySummary(models.Model):
+    day = models.DateField(unique=True)
+    loans = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+    # Start of the refresh that last recounted this day
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.day}: {self.loans} loans, {self.returns} returns"
+
+# Background work, queued by api.tasks.enqueue and run by `manage.py run_worker`
+class Task(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # Enqueueing the same key twice is a no-op
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due task; lease expiry and purges scan by status too
+            models.Index(fields=['status', 'run_at'], name='task_due_idx'),
+            models.Index(fields=['status', 'locked_until'], name='task_lease_idx'),
+            models.Index(fields=['status', 'finished_at'], name='task_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+# ------------------------------
+# Keyset pagination over (created_at, id)
+# - Every page is an index range scan, no OFFSET
+# ------------------------------
+class CreatedAtCursorPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,75 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # plain JSONRenderer output
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePackRenderer is only listed in settings when installed
+    msgpack = None
+
+# Dates, decimals, lazy translations, ... as DRF's JSON encoder writes them
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Same JSON as DRF's renderer, encoded by orjson when it is installed.
+
+    Dates and times go through DRF's encoder ('Z', milliseconds), U+2028/U+2029
+    are escaped as DRF does, and indented output (browsable API, ?indent)
+    is left to DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        content = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        # Valid JSON, but not valid JavaScript inside a <script> tag
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+# ------------------------------
+# Columnar lists (?format=columnar)
+# - A list of objects becomes {"columns": [...], "rows": [[...], ...]}, so
+#   field names are sent once instead of once per row
+# - Paginated responses keep next/previous and convert 'results'
+# ------------------------------
+def to_columns(items):
+    if not items or not all(isinstance(item, dict) for item in items):
+        return items
+    columns = list(items[0])
+    return {'columns': columns, 'rows': [[item.get(column) for column in columns] for item in items]}
+
+
+def columnar(data):
+    if isinstance(data, list):
+        return to_columns(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': to_columns(data['results'])}
+    return data
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    media_type = 'application/vnd.library.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Binary encoding of the same data (?format=msgpack, or Accept: application/msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default)
@@ -0,0 +1,195 @@
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Case, Count, DateField, F, IntegerField, Max, Q, Value, When, Window
+from django.utils import timezone
+
+from .models import Book, Loan, LoanArchive, LoanDailySummary, Student
+
+# Recount a little before the last refresh: loans committed late still get counted
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+# ------------------------------
+# Live reports (one query each)
+# ------------------------------
+def overdue_loans(limit, today=None):
+    """Open loans past their return date, oldest first, with the total count."""
+    today = today or timezone.localdate()
+    rows = list(
+        Loan.objects.filter(is_returned=False, return_date__lt=today)
+        .annotate(total=Window(Count('id')))
+        .order_by('return_date', 'id')
+        .values(
+            'id', 'student_id', 'book_id', 'loan_date', 'return_date', 'total',
+            student_name=F('student__name'),
+            book_title=F('book__title'),
+        )[:limit]
+    )
+    total = rows[0]['total'] if rows else 0
+    for row in rows:
+        del row['total']
+        row['days_overdue'] = (today - row['return_date']).days
+    return {'count': total, 'results': rows}
+
+
+# ------------------------------
+# Circulation totals
+# - Loans and archived loans are combined with UNION ALL and grouped, ranked
+#   and limited in one query, so archiving does not change the numbers and
+#   only `limit` rows leave the database
+# - Archived loans are all returned: open and overdue counts come from Loan
+# ------------------------------
+def _flag(condition):
+    return Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField())
+
+
+def _ranked_totals(key, filters, columns, limit):
+    """Rows of (key, loans, rank, *columns) over Loan and LoanArchive, busiest first.
+
+    `columns` maps a name to (aggregate, live expression, archived expression).
+    Ties share a rank, the next rank skips (1, 1, 3).
+    """
+    # Named aliases: the compiler numbers plain columns inside a UNION
+    live = Loan.objects.filter(**filters).values(
+        group_id=F(key), **{name: expression for name, (_, expression, _) in columns.items()}
+    )
+    archived = LoanArchive.objects.filter(**filters).values(
+        group_id=F(key), **{name: expression for name, (_, _, expression) in columns.items()}
+    )
+    union = live.union(archived, all=True)
+    connection = connections[union.db]
+    subquery, params = union.query.get_compiler(connection=connection).as_sql()
+
+    quote = connection.ops.quote_name
+    aggregates = ''.join(
+        f', {aggregate}({quote(name)}) AS {quote(name)}' for name, (aggregate, _, _) in columns.items()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT group_id, COUNT(*) AS loans, RANK() OVER (ORDER BY COUNT(*) DESC) AS loan_rank{aggregates}"
+            f" FROM ({subquery}) loans GROUP BY group_id ORDER BY loans DESC, group_id LIMIT %s",
+            [*params, limit],
+        )
+        return cursor.fetchall()
+
+
+def top_books(limit, since=None):
+    """Most borrowed books, archived loans included, ranked by loan count (ties share a rank)."""
+    filters = {'loan_date__gte': since} if since is not None else {}
+    rows = _ranked_totals('book_id', filters, {
+        'open_loans': ('SUM', _flag(Q(is_returned=False)), Value(0)),
+    }, limit)
+    books = Book.objects.only('title', 'author').in_bulk([row[0] for row in rows])
+    return [
+        {
+            'book_id': book_id,
+            'title': books[book_id].title,
+            'author': books[book_id].author,
+            'loans': loans,
+            'open_loans': int(open_loans),
+            'rank': rank,
+        }
+        for book_id, loans, rank, open_loans in rows
+    ]
+
+
+def student_circulation(limit, student_id=None, today=None):
+    """Loan totals per student, archived loans included, busiest first."""
+    today = today or timezone.localdate()
+    filters = {'student_id': student_id} if student_id is not None else {}
+    # Open loans have no actual_return_date, so only returned ones match
+    returned_late = _flag(Q(actual_return_date__gt=F('return_date')))
+    rows = _ranked_totals('student_id', filters, {
+        'open_loans': ('SUM', _flag(Q(is_returned=False)), Value(0)),
+        'overdue': ('SUM', _flag(Q(is_returned=False, return_date__lt=today)), Value(0)),
+        'returned_late': ('SUM', returned_late, returned_late),
+        'last_loan_date': ('MAX', F('loan_date'), F('loan_date')),
+    }, limit)
+    students = Student.objects.only('name', 'student_number').in_bulk([row[0] for row in rows])
+    # SQLite hands dates out of a subquery back as text
+    to_date = DateField().to_python
+    return [
+        {
+            'student_id': student_id,
+            'name': students[student_id].name,
+            'student_number': students[student_id].student_number,
+            'loans': loans,
+            'open_loans': int(open_loans),
+            'overdue': int(overdue),
+            'returned_late': int(returned_late),
+            'last_loan_date': to_date(last_loan_date),
+        }
+        for student_id, loans, _, open_loans, overdue, returned_late, last_loan_date in rows
+    ]
+
+
+# ------------------------------
+# Daily histogram
+# - Read from LoanDailySummary, so the cost depends on the number of days,
+#   not on the number of loans
+# - Refreshed by the periodic refresh_loan_summary task (every 5 minutes)
+#   or `manage.py refresh_loan_summary`, never by a report request
+# - A refresh recounts only the days touched by loans changed since the
+#   previous one; a full refresh recounts every day that has loans,
+#   archived ones included
+# - Loans deleted or moved to another day are only caught by a full refresh
+# - Days are counted over Loan and LoanArchive, so archiving keeps history
+# ------------------------------
+def _count_per_day(field, days):
+    counts = {}
+    for model in (Loan, LoanArchive):
+        for day, count in model.objects.filter(**{f'{field}__in': days}).values_list(field).annotate(Count('id')):
+            counts[day] = counts.get(day, 0) + count
+    return counts
+
+
+def refresh_loan_summary(full=False, batch_size=500):
+    """Recount changed days into LoanDailySummary; returns how many days were recounted."""
+    started = timezone.now()
+    loans = Loan.objects.all()
+    if not full:
+        watermark = LoanDailySummary.objects.aggregate(last=Max('refreshed_at'))['last']
+        if watermark is not None:
+            loans = loans.filter(updated_at__gte=watermark - REFRESH_OVERLAP)
+
+    days = set(loans.values_list('loan_date', flat=True).distinct())
+    days |= set(loans.exclude(actual_return_date=None).values_list('actual_return_date', flat=True).distinct())
+    if full:
+        days |= set(LoanArchive.objects.values_list('loan_date', flat=True).distinct())
+        days |= set(LoanArchive.objects.values_list('actual_return_date', flat=True).distinct())
+    days = sorted(days)
+
+    for start in range(0, len(days), batch_size):
+        chunk = days[start:start + batch_size]
+        loans_per_day = _count_per_day('loan_date', chunk)
+        returns_per_day = _count_per_day('actual_return_date', chunk)
+        LoanDailySummary.objects.bulk_create(
+            [
+                LoanDailySummary(
+                    day=day,
+                    loans=loans_per_day.get(day, 0),
+                    returns=returns_per_day.get(day, 0),
+                    refreshed_at=started,
+                )
+                for day in chunk
+            ],
+            update_conflicts=True,
+            unique_fields=['day'],
+            update_fields=['loans', 'returns', 'refreshed_at'],
+        )
+    return len(days)
+
+
+def daily_histogram(days, today=None):
+    """Loans and returns for each of the last `days` days, oldest first."""
+    today = today or timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    counts = {
+        row['day']: row
+        for row in LoanDailySummary.objects.filter(day__gte=first, day__lte=today).values('day', 'loans', 'returns')
+    }
+    return [
+        counts.get(day, {'day': day, 'loans': 0, 'returns': 0})
+        for day in (first + timedelta(days=offset) for offset in range(days))
+    ]
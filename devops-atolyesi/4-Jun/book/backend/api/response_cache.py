@@ -0,0 +1,132 @@
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .db_router import use_primary
+
+_config = settings.RESPONSE_CACHE
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _cache():
+    return caches[_config['ALIAS']]
+
+
+# ------------------------------
+# Hit/miss counters (per process)
+# ------------------------------
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(resource, event):
+    with _stats_lock:
+        _stats.setdefault(resource, Counter())[event] += 1
+
+
+def stats():
+    with _stats_lock:
+        resources = {resource: dict(counter) for resource, counter in _stats.items()}
+    for counter in resources.values():
+        lookups = counter.get('hits', 0) + counter.get('misses', 0)
+        counter['hit_ratio'] = round(counter.get('hits', 0) / lookups, 4) if lookups else None
+    return {'alias': _config['ALIAS'], 'pid': os.getpid(), 'resources': resources}
+
+
+# ------------------------------
+# Generations
+# - Cache keys embed generation numbers; invalidating bumps them, so old
+#   entries are never read again and simply expire
+# - 'list' covers list pages, 'all' plus the object's own generation cover
+#   a detail response
+# - A missing generation starts from the clock, so an evicted counter can
+#   never come back to a number that old entries were stored under
+# ------------------------------
+def _generation_key(resource, scope):
+    return f"response-cache:{resource}:gen:{scope}"
+
+
+def _generations(cache, resource, scopes):
+    keys = [_generation_key(resource, scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return ':'.join(str(found[key]) for key in keys)
+
+
+def _bump(cache, resource, scope):
+    key = _generation_key(resource, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def invalidate(resource, pk=None):
+    """Drop cached responses for one object (and every list), or for everything."""
+    if _config['ALIAS'] is None:
+        return
+    cache = _cache()
+    _bump(cache, resource, 'list')
+    _bump(cache, resource, 'all' if pk is None else pk)
+    _record(resource, 'invalidations')
+
+
+def invalidate_on_commit(resource, pk=None):
+    transaction.on_commit(lambda: invalidate(resource, pk))
+
+
+# ------------------------------
+# Cached reads
+# - Stores the serialized data with its ETag; the renderer still runs, but
+#   the queries and serializer are skipped on a hit
+# - If-None-Match matching the ETag answers 304 with no body
+# ------------------------------
+def cached_response(request, resource, build, pk=None):
+    """Serve `build()`'s 200 response from the cache while its generation is current."""
+    if _config['ALIAS'] is None:
+        return build()
+    cache = _cache()
+    scopes = ('list',) if pk is None else ('all', pk)
+    generation = _generations(cache, resource, scopes)
+    digest = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    key = f"response-cache:{resource}:{generation}:{digest}"
+
+    entry = cache.get(key)
+    if entry is not None:
+        _record(resource, 'hits')
+        etag, data = entry
+    else:
+        _record(resource, 'misses')
+        # A lagging replica would store stale data under the new generation
+        with use_primary():
+            response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        etag = '"%s"' % hashlib.md5(_encoder.encode(data).encode()).hexdigest()
+        cache.set(key, (etag, data), _config['TTL'])
+
+    # One representation per renderer (JSON, columnar, msgpack)
+    etag = f'{etag[:-1]}-{request.accepted_renderer.format}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        _record(resource, 'not_modified')
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Accept',))
+    return response
@@ -0,0 +1,116 @@
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models.functions import Length
+
+from .models import Book, BookSearchTerm
+from .utils import iterate_in_chunks
+
+MAX_TERM_LENGTH = 64
+# Distinct terms a typo lookup examines at most
+MAX_FUZZY_CANDIDATES = 500
+
+# Turkish letters folded to ASCII so "calikusu" finds "Çalıkuşu"
+TURKISH_FOLD = str.maketrans({
+    'ı': 'i', 'İ': 'i', 'I': 'i',
+    'ş': 's', 'Ş': 's',
+    'ğ': 'g', 'Ğ': 'g',
+    'ç': 'c', 'Ç': 'c',
+    'ö': 'o', 'Ö': 'o',
+    'ü': 'u', 'Ü': 'u',
+})
+
+
+def normalize(text):
+    text = text.translate(TURKISH_FOLD).lower()
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return {token[:MAX_TERM_LENGTH] for token in re.findall(r'\w+', normalize(text))}
+
+
+# ------------------------------
+# Indexing
+# ------------------------------
+def book_terms(book):
+    return tokenize(f"{book.title} {book.author}")
+
+
+def index_books(queryset, batch_size=1000):
+    """(Re)build the terms of every book in `queryset`; returns the book count."""
+    count = 0
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            BookSearchTerm.objects.filter(book_id__in=[book.pk for book in batch]).delete()
+            BookSearchTerm.objects.bulk_create([
+                BookSearchTerm(term=term, book_id=book.pk)
+                for book in batch
+                for term in book_terms(book)
+            ])
+        batch.clear()
+
+    for book in iterate_in_chunks(queryset.only('id', 'title', 'author'), batch_size):
+        batch.append(book)
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return count
+
+
+def index_book(book):
+    with transaction.atomic():
+        BookSearchTerm.objects.filter(book_id=book.pk).delete()
+        BookSearchTerm.objects.bulk_create([BookSearchTerm(term=term, book_id=book.pk) for term in book_terms(book)])
+
+
+# ------------------------------
+# Querying
+# - Each query token matches indexed terms by prefix (index range scan)
+# - Tokens with no prefix hit fall back to terms one typo away
+# - All tokens must match
+# ------------------------------
+def _within_one_edit(a, b):
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        # substitution, or transposition of neighbours
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i:] == b[i + 1:]
+
+
+def _fuzzy_terms(token):
+    # One edit changes the length by at most one
+    candidates = (
+        BookSearchTerm.objects.filter(term__startswith=token[:2])
+        .annotate(length=Length('term'))
+        .filter(length__range=(len(token) - 1, len(token) + 1))
+        .values_list('term', flat=True)
+        .distinct()[:MAX_FUZZY_CANDIDATES]
+    )
+    return [term for term in candidates if _within_one_edit(token, term)]
+
+
+def search_books(query, limit=20):
+    tokens = sorted(tokenize(query), key=len, reverse=True)
+    if not tokens:
+        return Book.objects.none()
+
+    queryset = Book.objects.all()
+    for token in tokens:
+        terms = BookSearchTerm.objects.filter(term__startswith=token)
+        if len(token) >= 4 and not terms.exists():
+            terms = BookSearchTerm.objects.filter(term__in=_fuzzy_terms(token))
+        queryset = queryset.filter(id__in=terms.values('book_id'))
+    return queryset.order_by('title', 'id')[:limit]
@@ -1,9 +1,92 @@
+import time
+
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 from django.contrib.auth import get_user_model
+from . import metrics
 from .models import Student, Book, Loan, Librarian
 
 User = get_user_model()
 
+
+def _readable_columns(fields, prefix=''):
+    # Map the readable fields of a serializer to ORM column paths for only()
+    columns = []
+    for field in fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        parts = field.source.split('.')
+        for depth in range(1, len(parts) + 1):
+            columns.append(prefix + '__'.join(parts[:depth]))
+        if isinstance(field, serializers.BaseSerializer):
+            nested = getattr(field, 'child', field)
+            columns.extend(_readable_columns(nested.fields, prefix + '__'.join(parts) + '__'))
+    return columns
+
+
+# ------------------------------
+# Eager loading
+# - Serializers declare the relations they read
+# - Views apply them so a list costs a fixed number of queries
+# ------------------------------
+class EagerLoadingMixin:
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def setup_eager_loading(self, queryset, restrict_columns=False, extra_columns=()):
+        select_related = self.select_related_fields
+        if restrict_columns:
+            columns = list(dict.fromkeys([*_readable_columns(self.fields), *extra_columns]))
+            # A relation left out by ?fields= is neither joined nor selected
+            select_related = [relation for relation in select_related if relation in columns]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        if restrict_columns:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    # ------------------------------
+    # Sparse fieldsets
+    # - ?fields=id,title keeps only those fields, ?exclude=created_at drops
+    #   some; GET requests, top-level serializer only
+    # - Applied before setup_eager_loading() reads self.fields, so the
+    #   SELECT narrows with the response
+    # ------------------------------
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        root = self.parent is None or (isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None)
+        if request is None or request.method != 'GET' or not root:
+            return fields
+
+        for param in ('fields', 'exclude'):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            names = {name.strip() for name in value.split(',') if name.strip()}
+            # Write-only fields (password, ...) are not in the response, so they cannot be asked for
+            unknown = names - {name for name, field in fields.items() if not field.write_only}
+            if unknown:
+                raise serializers.ValidationError({param: [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+            fields = {name: field for name, field in fields.items() if (name in names) == (param == 'fields')}
+        return fields
+
+    # Serializer time for the request metrics; nested serializers are
+    # already inside the outermost one's timing
+    def to_representation(self, instance):
+        stats = metrics.current.get()
+        if stats is None or stats.serializer_depth:
+            return super().to_representation(instance)
+        stats.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.serializer_depth -= 1
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -13,14 +96,14 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
     def create(self, validated_data):
-        print("Creating user with data:", validated_data)  # Debug log
         password = validated_data.pop('password')
         user = User(**validated_data)
         user.set_password(password)
         user.save()
         return user
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('user',)
     user = UserSerializer(read_only=True)
     email = serializers.EmailField(write_only=True)
     password = serializers.CharField(write_only=True)
@@ -39,34 +122,31 @@ class StudentSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        print("Creating student with data:", validated_data)  # Debug log
-        try:
-            email = validated_data.pop('email')
-            password = validated_data.pop('password')
-
-            user = User.objects.create_user(
-                email=email,
-                password=password,
-                role='student'
-            )
-            print(f"User created successfully: {user}")  # Debug log
-
-            student = Student.objects.create(
-                user=user,
-                **validated_data
-            )
-            print(f"Student profile created successfully: {student}")  # Debug log
-            return student
-        except Exception as e:
-            print(f"Error in student creation: {str(e)}")  # Debug log
-            raise
-
-class BookSerializer(serializers.ModelSerializer):
+        email = validated_data.pop('email')
+        password = validated_data.pop('password')
+
+        user = User.objects.create_user(
+            email=email,
+            password=password,
+            role='student'
+        )
+
+        return Student.objects.create(
+            user=user,
+            **validated_data
+        )
+
+class BookSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = '__all__'
+        # Maintained by the borrow/return service
+        read_only_fields = ('copies_on_loan', 'is_available')
+        # DRF builds no validator from Meta.constraints; without this a duplicate is a 500
+        validators = [UniqueTogetherValidator(queryset=Book.objects.all(), fields=('title', 'author'))]
 
-class LoanSerializer(serializers.ModelSerializer):
+class LoanSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('student', 'book')
     student_name = serializers.CharField(source='student.name', read_only=True)
     book_title = serializers.CharField(source='book.title', read_only=True)
 
@@ -74,7 +154,8 @@ class LoanSerializer(serializers.ModelSerializer):
         model = Loan
         fields = '__all__'
 
-class LibrarianSerializer(serializers.ModelSerializer):
+class LibrarianSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('user',)
     user = UserSerializer(read_only=True)
     email = serializers.EmailField(write_only=True)
     password = serializers.CharField(write_only=True)
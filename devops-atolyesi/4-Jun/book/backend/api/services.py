@@ -0,0 +1,141 @@
+import time
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import HAS_FREE_COPY, Book, Loan, LoanArchive
+from .response_cache import invalidate_on_commit
+from .tasks import enqueue
+from .utils import iterate_in_chunks
+
+
+class BookUnavailable(Exception):
+    """Raised when every copy of a book is on loan."""
+
+
+# ------------------------------
+# Borrow / return
+# - A copy is claimed with one conditional UPDATE on the counters, so two
+#   students can never take the last copy
+# - Only the changed columns are written
+# ------------------------------
+def borrow_book(student, book_id, loan_date=None):
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = Book.objects.filter(pk=book_id, copies_on_loan__lt=F('copies_total')).update(
+            copies_on_loan=F('copies_on_loan') + 1,
+            updated_at=now,
+        )
+        if not claimed:
+            if not Book.objects.filter(pk=book_id).exists():
+                raise Book.DoesNotExist("Book not found.")
+            raise BookUnavailable("This book is currently not available.")
+        # Separate statement: MySQL would see the incremented counter in the same SET
+        Book.objects.filter(pk=book_id).update(is_available=HAS_FREE_COPY)
+        invalidate_on_commit('books', book_id)
+
+        loan = Loan.objects.create(
+            student=student,
+            book_id=book_id,
+            loan_date=loan_date or now.date(),
+            return_date=None,
+            is_returned=False,
+        )
+        enqueue('notify_loan_created', {'loan_id': loan.pk}, key=f"loan-created:{loan.pk}")
+        return loan
+
+
+def return_loan(loan):
+    """Close `loan` and release its copy. Returns False if it was already returned."""
+    now = timezone.now()
+    with transaction.atomic():
+        closed = Loan.objects.filter(pk=loan.pk, is_returned=False).update(
+            is_returned=True,
+            actual_return_date=now.date(),
+            updated_at=now,
+        )
+        if closed:
+            Book.objects.filter(pk=loan.book_id, copies_on_loan__gt=0).update(
+                copies_on_loan=F('copies_on_loan') - 1,
+                is_available=True,
+                updated_at=now,
+            )
+            invalidate_on_commit('books', loan.book_id)
+            enqueue('notify_loan_returned', {'loan_id': loan.pk}, key=f"loan-returned:{loan.pk}")
+    return bool(closed)
+
+
+# ------------------------------
+# Counter reconciliation
+# - Compares copies_on_loan with the open loans, one batch of books at a time
+# ------------------------------
+def reconcile_book_counters(queryset, fix=False, batch_size=1000):
+    """Yield (book, recorded, counted) for every book whose copies_on_loan is off."""
+    batch = []
+
+    def check():
+        open_loans = dict(
+            Loan.objects.filter(book_id__in=[book.pk for book in batch], is_returned=False)
+            .values_list('book_id')
+            .annotate(count=Count('id'))
+        )
+        wrong = [
+            (book, book.copies_on_loan, open_loans.get(book.pk, 0))
+            for book in batch
+            if book.copies_on_loan != open_loans.get(book.pk, 0)
+        ]
+        if fix and wrong:
+            for book, _, counted in wrong:
+                book.copies_on_loan = counted
+                book.copies_total = max(book.copies_total, counted)
+                book.is_available = book.copies_on_loan < book.copies_total
+            Book.objects.bulk_update([book for book, _, _ in wrong], ['copies_on_loan', 'copies_total', 'is_available'])
+            for book, _, _ in wrong:
+                invalidate_on_commit('books', book.pk)
+        batch.clear()
+        return wrong
+
+    books = queryset.only('id', 'title', 'copies_total', 'copies_on_loan', 'is_available')
+    for book in iterate_in_chunks(books, batch_size):
+        batch.append(book)
+        if len(batch) >= batch_size:
+            yield from check()
+    if batch:
+        yield from check()
+
+
+# ------------------------------
+# Archival of returned loans
+# - Each batch is copied and deleted in its own short transaction, so no
+#   lock is held for the whole run
+# - Archive rows keep the loan id, so a batch interrupted after the copy is
+#   simply copied again (conflicts ignored) and deleted on the next run
+# ------------------------------
+ARCHIVE_FIELDS = ('id', 'student_id', 'book_id', 'loan_date', 'return_date', 'actual_return_date')
+
+
+def archive_returned_loans(returned_before, batch_size=1000, pause=0.0):
+    """Move loans returned before `returned_before` to LoanArchive.
+
+    Yields (loans moved, seconds the batch's transaction was open) per batch.
+    """
+    loans = Loan.objects.filter(is_returned=True, actual_return_date__lt=returned_before).order_by('pk')
+    last_pk = 0
+    while True:
+        rows = list(loans.filter(pk__gt=last_pk).values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return
+        now = timezone.now()
+        started = time.perf_counter()
+        with transaction.atomic():
+            LoanArchive.objects.bulk_create(
+                [LoanArchive(archived_at=now, **row) for row in rows],
+                ignore_conflicts=True,
+            )
+            Loan.objects.filter(pk__in=[row['id'] for row in rows], is_returned=True).delete()
+        held = time.perf_counter() - started
+        last_pk = rows[-1]['id']
+        yield len(rows), held
+        if pause:
+            time.sleep(pause)
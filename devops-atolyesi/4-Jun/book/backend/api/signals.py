@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token
+from .metrics import track_query
+from .models import Book, Loan
+from .response_cache import invalidate_on_commit
+from .search import index_book
+
+
+# ------------------------------
+# Token cache invalidation
+# ------------------------------
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_tokens_of_changed_user(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the cached user does not need
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+# ------------------------------
+# Search index sync (terms of deleted books cascade)
+# ------------------------------
+@receiver(post_save, sender=Book)
+def reindex_saved_book(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'title', 'author'} & set(update_fields):
+        return
+    index_book(instance)
+
+
+# ------------------------------
+# Response cache invalidation
+# ------------------------------
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    invalidate_on_commit('books', instance.pk)
+
+
+# ------------------------------
+# Copy counters: deleting an open loan frees its copy
+# ------------------------------
+@receiver(post_delete, sender=Loan)
+def release_copy_of_deleted_loan(sender, instance, **kwargs):
+    if not instance.is_returned:
+        Book.objects.filter(pk=instance.book_id, copies_on_loan__gt=0).update(
+            copies_on_loan=F('copies_on_loan') - 1,
+            is_available=True
+        )
+        invalidate_on_commit('books', instance.book_id)
+
+
+# ------------------------------
+# Request metrics: count and time every SQL statement
+# ------------------------------
+@receiver(connection_created)
+def install_query_tracker(sender, connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
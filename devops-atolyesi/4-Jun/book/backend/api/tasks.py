@@ -0,0 +1,244 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import reports
+from .models import Loan, Task
+from .utils import iterate_in_chunks
+
+logger = logging.getLogger(__name__)
+
+_config = settings.TASKS
+_registry = {}
+
+
+def task(max_attempts=5):
+    """Register a function as a task; its payload is passed as keyword arguments."""
+    def register(fn):
+        _registry[fn.__name__] = (fn, max_attempts)
+        return fn
+    return register
+
+
+# ------------------------------
+# Enqueueing
+# - Rows are inserted in the caller's transaction: a rolled back request
+#   queues nothing, workers never see uncommitted rows, and a failed insert
+#   rolls back the change it belongs to instead of surfacing after the commit
+# - An idempotency key already in the table makes the insert a no-op
+# ------------------------------
+def enqueue_many(name, items, delay=0):
+    """Queue `name` once per (payload, idempotency_key) in `items`."""
+    _, max_attempts = _registry[name]
+    run_at = timezone.now() + timedelta(seconds=delay)
+    tasks = [
+        Task(name=name, payload=payload or {}, idempotency_key=key, max_attempts=max_attempts, run_at=run_at)
+        for payload, key in items
+    ]
+    Task.objects.bulk_create(tasks, batch_size=500, ignore_conflicts=True)
+
+
+def enqueue(name, payload=None, key=None, delay=0):
+    enqueue_many(name, [(payload, key)], delay)
+
+
+def schedule_periodic(now=None):
+    """Queue each settings.TASKS['PERIODIC'] task once per interval, across all workers."""
+    now = now or time.time()
+    for name, interval in _config['PERIODIC'].items():
+        enqueue(name, key=f"{name}:{int(now // interval)}")
+
+
+def requeue_expired():
+    """Put tasks back whose worker died before finishing (the attempt still counts).
+
+    Tasks that died on their last attempt are failed instead. Returns the requeued count.
+    """
+    now = timezone.now()
+    expired = Task.objects.filter(status=Task.Status.RUNNING, locked_until__lt=now)
+    expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.Status.FAILED,
+        locked_by='',
+        locked_until=None,
+        finished_at=now,
+        last_error="Worker lease expired on the last attempt.",
+    )
+    return expired.filter(attempts__lt=F('max_attempts')).update(
+        status=Task.Status.QUEUED,
+        locked_by='',
+        last_error="Worker lease expired.",
+    )
+
+
+# ------------------------------
+# Running
+# - A worker claims the oldest due task with SELECT ... FOR UPDATE SKIP
+#   LOCKED, so workers never wait on each other's rows
+# - Failures retry with exponential backoff (and jitter) until max_attempts
+# - Results are only written while the worker still holds the lease
+# ------------------------------
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker):
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.Status.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .first()
+        )
+        if claimed is None:
+            return None
+        claimed.status = Task.Status.RUNNING
+        claimed.attempts += 1
+        claimed.locked_by = worker
+        claimed.locked_until = now + timedelta(seconds=_config['LEASE'])
+        claimed.save(update_fields=['status', 'attempts', 'locked_by', 'locked_until'])
+    return claimed
+
+
+def retry_delay(attempts):
+    delay = min(_config['RETRY_MAX'], _config['RETRY_BASE'] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def execute(claimed, worker):
+    started = time.perf_counter()
+    fn, _ = _registry.get(claimed.name, (None, None))
+    try:
+        if fn is None:
+            raise LookupError(f"Unknown task {claimed.name!r}.")
+        fn(**claimed.payload)
+    except Exception:
+        now = timezone.now()
+        retry = fn is not None and claimed.attempts < claimed.max_attempts
+        fields = {
+            'status': Task.Status.QUEUED if retry else Task.Status.FAILED,
+            'last_error': traceback.format_exc()[-4000:],
+        }
+        if retry:
+            fields['run_at'] = now + timedelta(seconds=retry_delay(claimed.attempts))
+        else:
+            fields['finished_at'] = now
+        logger.warning("task failed", exc_info=True, extra={
+            'task': claimed.name, 'task_id': claimed.pk, 'attempts': claimed.attempts, 'retry': retry,
+        })
+    else:
+        fields = {'status': Task.Status.DONE, 'last_error': '', 'finished_at': timezone.now()}
+        logger.info("task done", extra={
+            'task': claimed.name, 'task_id': claimed.pk, 'attempts': claimed.attempts,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        })
+    Task.objects.filter(pk=claimed.pk, locked_by=worker).update(locked_until=None, **fields)
+
+
+def work(stop=None, poll=1.0):
+    """Run due tasks until `stop` is set; without `stop`, until none are due. Returns the count."""
+    worker = worker_name()
+    done = 0
+    while stop is None or not stop.is_set():
+        try:
+            claimed = claim(worker)
+        except DatabaseError:
+            if stop is None:
+                raise
+            # Database restarting or failing over: keep the worker, try again shortly
+            logger.warning("claiming a task failed", exc_info=True)
+            stop.wait(poll)
+            continue
+        if claimed is None:
+            if stop is None:
+                break
+            stop.wait(poll)
+            continue
+        execute(claimed, worker)
+        done += 1
+    return done
+
+
+# ------------------------------
+# Tasks
+# ------------------------------
+def _loan(loan_id):
+    # None once the loan has been archived or deleted
+    return Loan.objects.select_related('book', 'student__user').filter(pk=loan_id).first()
+
+
+@task()
+def notify_loan_created(loan_id):
+    loan = _loan(loan_id)
+    if loan is None:
+        return
+    due = f" Please return it by {loan.return_date}." if loan.return_date else ""
+    send_mail(
+        f"You borrowed {loan.book.title}",
+        f"Hello {loan.student.name}, you borrowed {loan.book.title} by {loan.book.author} on {loan.loan_date}.{due}",
+        None,
+        [loan.student.user.email],
+    )
+
+
+@task()
+def notify_loan_returned(loan_id):
+    loan = _loan(loan_id)
+    if loan is None:
+        return
+    send_mail(
+        f"You returned {loan.book.title}",
+        f"Hello {loan.student.name}, {loan.book.title} was returned on {loan.actual_return_date}. Thank you!",
+        None,
+        [loan.student.user.email],
+    )
+
+
+@task()
+def send_overdue_reminder(loan_id):
+    loan = _loan(loan_id)
+    if loan is None or loan.is_returned:
+        return
+    send_mail(
+        f"{loan.book.title} is overdue",
+        f"Hello {loan.student.name}, {loan.book.title} was due on {loan.return_date}. Please return it to the library.",
+        None,
+        [loan.student.user.email],
+    )
+
+
+@task(max_attempts=3)
+def overdue_sweep():
+    """One reminder per overdue loan per day."""
+    today = timezone.localdate()
+    overdue = Loan.objects.filter(is_returned=False, return_date__lt=today).only('pk')
+    batch = []
+    for loan in iterate_in_chunks(overdue):
+        batch.append(({'loan_id': loan.pk}, f"overdue-reminder:{loan.pk}:{today}"))
+        if len(batch) == 1000:
+            enqueue_many('send_overdue_reminder', batch)
+            batch = []
+    if batch:
+        enqueue_many('send_overdue_reminder', batch)
+
+
+@task(max_attempts=3)
+def refresh_loan_summary():
+    reports.refresh_loan_summary()
+
+
+@task(max_attempts=3)
+def purge_tasks():
+    """Drop finished tasks after TASKS['KEEP_DAYS']; failed ones stay for inspection."""
+    cutoff = timezone.now() - timedelta(days=_config['KEEP_DAYS'])
+    Task.objects.filter(status=Task.Status.DONE, finished_at__lt=cutoff).delete()
@@ -0,0 +1,348 @@
+import datetime
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .compiled import Uncompilable
+from . import reports, response_cache, tasks
+from .authentication import CachedTokenAuthentication, local_tokens
+from .models import Book, Librarian, Loan, LoanArchive, Student, Task, User
+from .renderers import FastJSONRenderer
+from .services import BookUnavailable, archive_returned_loans, borrow_book
+from .throttling import local_buckets
+
+
+def make_user(email, role, **extra):
+    return User.objects.create_user(email, 'pw12345!', role=role, first_name='Test', last_name='User', **extra)
+
+
+def make_rows(count, offset=0):
+    """`count` students, librarians, books and loans (one loan per student)."""
+    today = timezone.localdate()
+    for number in range(offset, offset + count):
+        student = Student.objects.create(
+            user=make_user(f'student{number}@test.com', User.Role.STUDENT),
+            name=f'Student {number}',
+            student_number=f'S{number:05d}',
+        )
+        Librarian.objects.create(
+            user=make_user(f'librarian{number}@test.com', User.Role.LIBRARIAN),
+            name=f'Librarian {number}',
+            employee_number=f'E{number:05d}',
+        )
+        book = Book.objects.create(title=f'Book {number}', author=f'Author {number}', copies_total=2)
+        Loan.objects.create(student=student, book=book, loan_date=today, return_date=today + timedelta(days=14))
+
+
+# ------------------------------
+# Query counts for the list endpoints
+# - Each page costs the same number of queries at any row count; a count
+#   that grows with the rows is an N+1 in the serializer or queryset
+# - Responses are never cached here, so every request runs its queries
+# ------------------------------
+@mock.patch('api.response_cache._cache', lambda: DummyCache('none', {}))
+class ListQueryCountTests(TestCase):
+    endpoints = {
+        '/api/students/': 1,
+        '/api/librarians/': 1,
+        '/api/books/': 1,
+        '/api/loans/': 1,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin@test.com', User.Role.ADMIN, is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertListQueries(self, rows):
+        for url, queries in self.endpoints.items():
+            with self.subTest(url=url, rows=rows), self.assertNumQueries(queries):
+                response = self.client.get(url, {'page_size': 100})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), rows)
+
+    def test_few_rows(self):
+        make_rows(3)
+        self.assertListQueries(3)
+
+    def test_many_rows(self):
+        make_rows(40)
+        self.assertListQueries(40)
+
+
+# ------------------------------
+# Compiled list serialization (api.compiled)
+# - Every page of every list, with and without ?fields/?exclude, must be
+#   byte-identical to the serializer.data path (responses never cached)
+# ------------------------------
+@mock.patch('api.response_cache._cache', lambda: DummyCache('none', {}))
+class CompiledListTests(TestCase):
+    queries = {
+        '/api/students/': [{}, {'fields': 'id,user,name'}, {'exclude': 'created_at,updated_at'}],
+        '/api/librarians/': [{}, {'fields': 'user,employee_number'}, {'exclude': 'user'}],
+        '/api/books/': [{}, {'fields': 'id,title'}, {'exclude': 'copies_total,is_available'}],
+        '/api/loans/': [{}, {'fields': 'id,student_name,book'}, {'exclude': 'student_name,loan_date'}],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin@test.com', User.Role.ADMIN, is_staff=True)
+        make_rows(5)
+        Loan.objects.filter(pk=Loan.objects.order_by('pk').first().pk).update(
+            is_returned=True, actual_return_date=timezone.localdate(),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def pages(self, url, params):
+        pages = []
+        response = self.client.get(url, {**params, 'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.content)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_matches_serializer(self):
+        for url, variants in self.queries.items():
+            for params in variants:
+                with self.subTest(url=url, params=params):
+                    compiled = self.pages(url, params)
+                    with mock.patch('api.views.CompiledSerializer', side_effect=Uncompilable):
+                        regular = self.pages(url, params)
+                    self.assertEqual(len(compiled), 3)
+                    self.assertEqual(compiled, regular)
+
+
+# ------------------------------
+# Cached book detail (api.response_cache)
+# - Every spelling of an id shares the object's generation, so one
+#   invalidation drops all of them
+# ------------------------------
+@mock.patch.dict('api.response_cache._config', ALIAS='default')
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('reader@test.com', User.Role.ADMIN, is_staff=True)
+        cls.book = Book.objects.create(title='Before', author='Author', copies_total=1)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_padded_id_is_invalidated_with_the_book(self):
+        url = f'/api/books/0{self.book.pk}/'
+        self.assertEqual(self.client.get(url).data['title'], 'Before')
+        Book.objects.filter(pk=self.book.pk).update(title='After')
+        response_cache.invalidate('books', self.book.pk)
+        self.assertEqual(self.client.get(url).data['title'], 'After')
+
+    def test_malformed_id_is_not_found(self):
+        self.assertEqual(self.client.get('/api/books/abc/').status_code, 404)
+
+
+# ------------------------------
+# Circulation reports (api.reports)
+# - Archiving returned loans must not change the totals or the ranking
+# ------------------------------
+class CirculationReportTests(TestCase):
+    def test_archiving_keeps_totals(self):
+        make_rows(4)
+        today = timezone.localdate()
+        students = list(Student.objects.order_by('pk'))
+        book = Book.objects.order_by('pk').first()
+        for student in students[:2]:
+            Loan.objects.create(
+                student=student, book=book, loan_date=today - timedelta(days=60),
+                return_date=today - timedelta(days=46), is_returned=True, actual_return_date=today - timedelta(days=40),
+            )
+
+        before = reports.top_books(3), reports.student_circulation(10)
+        self.assertEqual([row['loans'] for row in before[0]], [3, 1, 1])
+        self.assertEqual([row['rank'] for row in before[0]], [1, 2, 2])
+        self.assertEqual(before[1][0]['last_loan_date'], today)
+
+        self.assertEqual(sum(moved for moved, _ in archive_returned_loans(today - timedelta(days=30))), 2)
+        self.assertEqual(LoanArchive.objects.count(), 2)
+        self.assertEqual((reports.top_books(3), reports.student_circulation(10)), before)
+
+
+# ------------------------------
+# Token cache (api.authentication)
+# - The shared tier never holds the user row; a revocation outdates the
+#   local entries of every worker through the shared generation
+# ------------------------------
+@mock.patch.dict('api.authentication._config', SHARED_ALIAS='default')
+@mock.patch.object(local_tokens, 'ttl', 30)
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        local_tokens.clear()
+        caches['default'].clear()
+        self.user = make_user('reader@test.com', User.Role.STUDENT)
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_shared_tier_holds_no_user(self):
+        self.auth.authenticate_credentials(self.token.key)
+        cached = caches['default'].get(f'auth-token:{self.token.key}')
+        self.assertEqual(cached, (self.user.pk, True, self.token.created))
+
+        # Another worker: empty local tier, user loaded by primary key
+        local_tokens.clear()
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_revocation_outdates_local_entries(self):
+        self.auth.authenticate_credentials(self.token.key)
+        # Another worker's invalidation only reaches this one through the generation
+        entry = local_tokens.get(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        local_tokens.set(self.token.key, entry)
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+
+# ------------------------------
+# Login throttles (api.throttling)
+# - Only failed logins take tokens; the owner's successful login refills
+#   the account's bucket
+# ------------------------------
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_user('owner@test.com', User.Role.STUDENT)
+
+    def setUp(self):
+        local_buckets._buckets.clear()
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post('/api/auth/login/', {'email': 'owner@test.com', 'password': password}, format='json')
+
+    def test_successful_logins_are_free(self):
+        for _ in range(8):
+            self.assertEqual(self.login('pw12345!').status_code, 200)
+
+    def test_failures_lock_the_account_until_the_owner_logs_in(self):
+        for _ in range(4):
+            self.assertEqual(self.login('wrong').status_code, 400)
+        self.assertEqual(self.login('pw12345!').status_code, 200)
+        for _ in range(5):
+            self.assertEqual(self.login('wrong').status_code, 400)
+        response = self.login('pw12345!')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+# ------------------------------
+# Task leases (api.tasks)
+# - A task whose worker died is retried only while it has attempts left
+# ------------------------------
+class RequeueExpiredTests(TestCase):
+    def test_exhausted_tasks_fail_instead_of_requeueing(self):
+        expired = timezone.now() - timedelta(minutes=1)
+        retry, exhausted = (
+            Task.objects.create(name='refresh_loan_summary', status=Task.Status.RUNNING, attempts=attempts,
+                                max_attempts=3, locked_by='gone:1', locked_until=expired)
+            for attempts in (2, 3)
+        )
+        self.assertEqual(tasks.requeue_expired(), 1)
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retry.status, Task.Status.QUEUED)
+        self.assertEqual(exhausted.status, Task.Status.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+
+
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin@test.com', User.Role.ADMIN, is_staff=True)
+        make_rows(1)
+
+    def test_write_only_field_is_unknown(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/students/', {'fields': 'email'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_drf(self):
+        moment = datetime.datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)
+        samples = [
+            {'aware': moment, 'whole': moment.replace(microsecond=0), 'naive': moment.replace(tzinfo=None)},
+            {'day': moment.date(), 'time': datetime.time(3, 4, 5, 678901), 1: 'int key'},
+            {'text': 'line\u2028paragraph\u2029 çğış "quoted" </script>', 'items': [1.5, None, True]},
+            [],
+            None,
+        ]
+        for data in samples:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+# ------------------------------
+# Borrowing under contention (api.services)
+# - Many students racing for the last copies: never more open loans than
+#   copies, and the counter agrees with the loans
+# ------------------------------
+class BorrowContentionTests(TransactionTestCase):
+    threads = 8
+
+    def test_no_double_loans(self):
+        make_rows(self.threads)
+        students = list(Student.objects.all())
+        book = Book.objects.create(title='Contended', author='Author', copies_total=2)
+        barrier = threading.Barrier(self.threads)
+        outcomes = []
+
+        def borrow(student):
+            try:
+                barrier.wait()
+                borrow_book(student, book.pk)
+                outcomes.append('borrowed')
+            except BookUnavailable:
+                outcomes.append('unavailable')
+            except DatabaseError:
+                # SQLite locks the whole file instead of waiting on the row
+                outcomes.append('locked')
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=borrow, args=(student,)) for student in students]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        book.refresh_from_db()
+        open_loans = Loan.objects.filter(book=book, is_returned=False).count()
+        self.assertEqual(len(outcomes), self.threads)
+        self.assertEqual(outcomes.count('borrowed'), open_loans)
+        self.assertGreaterEqual(open_loans, 1)
+        self.assertLessEqual(open_loans, book.copies_total)
+        self.assertEqual(book.copies_on_loan, open_loans)
+        self.assertEqual(book.is_available, open_loans < book.copies_total)
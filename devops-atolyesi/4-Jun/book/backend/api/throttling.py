@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+_config = settings.THROTTLE
+
+
+# ------------------------------
+# Token buckets
+# - A bucket holds up to `capacity` tokens and refills at `rate` per second;
+#   each request takes one, an empty bucket answers with the wait until the
+#   next token
+# - A cost of 0 only checks that a token is left; reset() refills a bucket
+# - Shared: one Lua script per request on the Redis tier, so every worker
+#   and container draws from the same bucket
+# - Local: per process, used without Redis and whenever Redis fails
+# ------------------------------
+class LocalBuckets:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - cost
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class SharedBuckets:
+    def __init__(self, cache):
+        self.cache = cache
+        self._script = None
+
+    def take(self, key, capacity, rate, cost=1):
+        # Django's cache API has no atomic read-modify-write, so go to the client
+        client = self.cache._cache.get_client(key, write=True)
+        if self._script is None:
+            self._script = client.register_script(_TAKE_SCRIPT)
+        return float(self._script(keys=[self.cache.make_key(key)], args=[capacity, rate, cost], client=client))
+
+    def reset(self, key):
+        self.cache._cache.get_client(key, write=True).delete(self.cache.make_key(key))
+
+
+local_buckets = LocalBuckets(_config['LOCAL_MAXSIZE'])
+_shared_alias = _config['SHARED_ALIAS']
+shared_buckets = (
+    SharedBuckets(caches[_shared_alias])
+    if _shared_alias and isinstance(caches[_shared_alias], RedisCache) else None
+)
+_shared_failing = False
+
+
+def _call(method, key, *args):
+    global _shared_failing
+    if shared_buckets is not None:
+        try:
+            result = getattr(shared_buckets, method)(key, *args)
+        except Exception:
+            if not _shared_failing:
+                logger.warning("shared rate limiting unavailable, using per-process buckets", exc_info=True)
+            _shared_failing = True
+        else:
+            _shared_failing = False
+            return result
+    return getattr(local_buckets, method)(key, *args)
+
+
+def take(key, capacity, rate, cost=1):
+    """Take `cost` tokens from `key`'s bucket; returns 0, or the seconds until one is free."""
+    return _call('take', key, capacity, rate, cost)
+
+
+def reset(key):
+    """Refill `key`'s bucket."""
+    _call('reset', key)
+
+
+# ------------------------------
+# DRF throttles
+# - Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] as usual;
+#   '10/min' is a bucket of 10 refilled over a minute
+# - Login throttles only check the bucket up front; record_login() charges
+#   failed attempts afterwards, so logging in successfully never uses up
+#   anyone's budget
+# ------------------------------
+class TokenBucketMixin:
+    # Tokens taken by allow_request
+    cost = 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.wait_seconds = take(self.key, self.num_requests, self.num_requests / self.duration, self.cost)
+        return not self.wait_seconds
+
+    def wait(self):
+        return math.ceil(self.wait_seconds)
+
+
+class AnonRateThrottle(TokenBucketMixin, throttling.AnonRateThrottle):
+    """Every endpoint, per client IP, for unauthenticated requests."""
+
+
+class UserRateThrottle(TokenBucketMixin, throttling.UserRateThrottle):
+    """Every endpoint, per user (per IP when anonymous)."""
+
+
+class FailedLoginThrottle(TokenBucketMixin, throttling.SimpleRateThrottle):
+    """Refuses once the bucket is empty; only record_login() takes tokens."""
+    cost = 0
+    reset_on_success = False
+
+    def record(self, request, succeeded):
+        if self.rate is None:
+            return
+        key = self.get_cache_key(request, None)
+        if key is None:
+            return
+        if not succeeded:
+            take(key, self.num_requests, self.num_requests / self.duration)
+        elif self.reset_on_success:
+            reset(key)
+
+
+class LoginIPThrottle(FailedLoginThrottle):
+    """Failed logins from one IP (password spraying); a campus NAT shares it."""
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginAccountThrottle(FailedLoginThrottle):
+    """Failed logins on one account from any number of IPs (credential stuffing)."""
+    scope = 'login-account'
+    # The owner logging in clears what others spent on the account
+    reset_on_success = True
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if isinstance(request.data, dict) else None
+        if not isinstance(email, str) or not email:
+            return None
+        ident = hashlib.sha1(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class RegistrationThrottle(TokenBucketMixin, throttling.AnonRateThrottle):
+    scope = 'register'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class BorrowThrottle(TokenBucketMixin, throttling.UserRateThrottle):
+    scope = 'borrow'
+
+
+LOGIN_THROTTLES = (LoginIPThrottle, LoginAccountThrottle)
+
+
+def record_login(request, succeeded):
+    """Charge a failed login to the login buckets, or reset the account's on success."""
+    for throttle_class in LOGIN_THROTTLES:
+        throttle_class().record(request, succeeded)
+
+
+def throttle_wait(request, throttles):
+    """For views outside DRF's dispatch: the longest wait among refusing `throttles`, or None."""
+    waits = [throttle.wait() for throttle in throttles if not throttle.allow_request(request, None)]
+    return max(waits) if waits else None
@@ -7,8 +7,15 @@ from .views import (
     LibrarianViewSet,
     login_view,
     health_check,
-    logout_view
+    logout_view,
+    cache_stats,
+    metrics_view,
+    overdue_report,
+    top_books_report,
+    circulation_report,
+    daily_report
 )
+from . import async_views
 
 
 router = DefaultRouter()
@@ -22,5 +29,20 @@ urlpatterns = [
     path('auth/login/', login_view, name='login'),
     path('auth/logout/', logout_view, name='logout'),
     path('health/', health_check, name='health-check'),
+    path('cache/stats/', cache_stats, name='cache-stats'),
+    path('metrics/', metrics_view, name='metrics'),
+
+    # Reports (admins and librarians)
+    path('reports/overdue/', overdue_report, name='report-overdue'),
+    path('reports/top-books/', top_books_report, name='report-top-books'),
+    path('reports/circulation/', circulation_report, name='report-circulation'),
+    path('reports/daily/', daily_report, name='report-daily'),
+
+    # Async read paths (ASGI)
+    path('async/health/', async_views.health_check, name='async-health-check'),
+    path('async/auth/login/', async_views.login, name='async-login'),
+    path('async/books/', async_views.book_list, name='async-book-list'),
+    path('async/books/<int:pk>/', async_views.book_detail, name='async-book-detail'),
+    path('async/loans/mine/', async_views.my_loans, name='async-my-loans'),
 
 ]
@@ -0,0 +1,15 @@
+def iterate_in_chunks(queryset, chunk_size=2000):
+    """Yield rows in primary key batches of `chunk_size`.
+
+    mysqlclient buffers the whole result of `.iterator()` on the client, so
+    keyset batches are used instead to keep memory flat on large tables.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch[:chunk_size])
+        if not batch:
+            return
+        yield from batch
+        last_pk = batch[-1].pk
@@ -1,9 +1,22 @@
-from rest_framework import viewsets, permissions, status
+import logging
+
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.utils.encoders import JSONEncoder
+from functools import partial
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework.pagination import LimitOffsetPagination
 from django.utils import timezone
-from .models import Student, Book, Loan, Librarian
+from datetime import timedelta
+from . import bulk, db_router, metrics, reports, response_cache, throttling
+from .compiled import CompiledSerializer, Uncompilable
+from .models import Student, Book, Loan, LoanArchive, Librarian
 from .serializers import (
     StudentSerializer,
     BookSerializer,
@@ -11,7 +24,15 @@ from .serializers import (
     LibrarianSerializer,
     UserSerializer
 )
+from .hashers import HashingBusy
+from .search import search_books
+from .services import BookUnavailable, borrow_book, return_loan
+from .utils import iterate_in_chunks
 from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+auth_logger = logging.getLogger('api.auth')
+
 @api_view(['GET'])
 def health_check(request):
     return Response({"status": "ok"})
@@ -20,18 +41,23 @@ def health_check(request):
 # ------------------------------
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes(throttling.LOGIN_THROTTLES)
 def login_view(request):
+    if not isinstance(request.data, dict):
+        return Response({"detail": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
     email = request.data.get('email')
     password = request.data.get('password')
-    print(f"Login attempt with email: {email}")
 
     # 'username=email' kullanılır çünkü USERNAME_FIELD = 'email'
     user = authenticate(request, username=email, password=password)
-    print(f"Authentication result: {'Success' if user else 'Failed'}")
+    throttling.record_login(request, succeeded=user is not None)
 
     if user is not None:
+        auth_logger.info("login succeeded", extra={'user_id': user.pk})
         login(request, user)
         token, _ = Token.objects.get_or_create(user=user)
+        # The next request authenticates with the token; it must see the token too
+        db_router.pin(token.key)
         return Response({
             'token': token.key,
             'user_id': user.pk,
@@ -39,6 +65,7 @@ def login_view(request):
             'role': user.role
         })
     else:
+        auth_logger.warning("login failed", extra={'email': email})
         return Response(
             {"error": "Invalid credentials"},
             status=status.HTTP_400_BAD_REQUEST
@@ -66,10 +93,168 @@ class IsStudentUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and request.user.role == 'student'
 
+class IsStaffUser(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated and request.user.role in ('admin', 'librarian')
+
+# ------------------------------
+# Eager loading for ViewSets
+# - Relations come from the serializer's declaration
+# - Read actions also narrow the SELECT to the serialized columns
+# ------------------------------
+class EagerLoadingQuerysetMixin:
+    read_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer()
+        if hasattr(serializer, 'setup_eager_loading'):
+            queryset = serializer.setup_eager_loading(
+                queryset,
+                restrict_columns=self.action in self.read_actions,
+                # The cursor is built from these even when ?fields= leaves them out
+                extra_columns=[field.lstrip('-') for field in getattr(self.paginator, 'ordering', ())],
+            )
+        return queryset
+
+# ------------------------------
+# NDJSON streaming for list endpoints
+# - ?stream=ndjson returns one JSON object per line
+# - Rows are read in keyset batches, so memory stays flat
+# ------------------------------
+class NDJSONStreamMixin:
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') == 'ndjson':
+            return self.stream_ndjson(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def stream_ndjson(self, queryset):
+        serializer = self.get_serializer()
+        encoder = JSONEncoder(ensure_ascii=False)
+
+        def lines():
+            for instance in iterate_in_chunks(queryset, settings.STREAM_CHUNK_SIZE):
+                yield encoder.encode(serializer.to_representation(instance)) + '\n'
+
+        return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+# ------------------------------
+# Compiled list serialization
+# - list() reads .values() dicts and builds rows from the serializer's
+#   compiled field plan (api.compiled), skipping model instances
+# - Same payload as the serializer; anything the plan cannot reproduce
+#   takes the regular path
+# ------------------------------
+class CompiledListMixin:
+    def list(self, request, *args, **kwargs):
+        try:
+            compiled = CompiledSerializer(self.get_serializer())
+        except Uncompilable:
+            return super().list(request, *args, **kwargs)
+
+        # The cursor reads its position from the rows
+        ordering = [field.lstrip('-') for field in getattr(self.paginator, 'ordering', ())]
+        queryset = self.filter_queryset(self.get_queryset()).values(*dict.fromkeys([*compiled.columns, *ordering]))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.rows(page))
+        return Response(compiled.rows(queryset))
+
+# ------------------------------
+# Cached list/retrieve
+# - Responses are shared by every user allowed to read them
+# - Permissions still run first; ?stream= bypasses the cache
+# - The detail key uses the parsed pk, so /books/05/ is invalidated with /books/5/
+# ------------------------------
+class CachedReadMixin:
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        build = partial(super().list, request, *args, **kwargs)
+        if request.query_params.get('stream'):
+            return build()
+        return response_cache.cached_response(request, self.cache_resource, build)
+
+    def retrieve(self, request, *args, **kwargs):
+        build = partial(super().retrieve, request, *args, **kwargs)
+        model = self.get_queryset().model
+        field = model._meta.pk if self.lookup_field == 'pk' else model._meta.get_field(self.lookup_field)
+        try:
+            pk = field.to_python(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except DjangoValidationError:
+            raise Http404
+        return response_cache.cached_response(request, self.cache_resource, build, pk=pk)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response(response_cache.stats())
+
+
+# Prometheus scrape target (per process); scrape with `authorization: {type: Token}`
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ------------------------------
+# Reports (admins and librarians)
+# - Aggregated in the database; nothing goes through LoanSerializer
+# ------------------------------
+def _int_param(request, name, default, maximum):
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        value = default
+    return max(1, min(value, maximum))
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffUser])
+def overdue_report(request):
+    return Response(reports.overdue_loans(_int_param(request, 'limit', 100, 1000)))
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffUser])
+def top_books_report(request):
+    since = None
+    if 'days' in request.query_params:
+        since = timezone.localdate() - timedelta(days=_int_param(request, 'days', 30, 3660) - 1)
+    return Response(reports.top_books(_int_param(request, 'limit', 20, 500), since))
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffUser])
+def circulation_report(request):
+    student_id = request.query_params.get('student')
+    if student_id is not None and not student_id.isdigit():
+        return Response({"error": "student must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(reports.student_circulation(_int_param(request, 'limit', 100, 1000), student_id))
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffUser])
+def daily_report(request):
+    # Read-only: the worker's periodic refresh_loan_summary task keeps the summary current
+    return Response(reports.daily_histogram(_int_param(request, 'days', 30, 366)))
+
+# ------------------------------
+# Bulk uploads: a multipart 'file', or a raw CSV/NDJSON body (?fmt= overrides)
+# ------------------------------
+def _upload_stream(request):
+    upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+    if upload is not None:
+        stream, fmt = upload, bulk.format_from_name(upload.name)
+    else:
+        stream, fmt = request.stream, 'csv' if request.content_type.startswith('text/csv') else 'ndjson'
+    return stream, request.query_params.get('fmt', fmt)
+
 # ------------------------------
 # Librarian ViewSet (Admins only)
 # ------------------------------
-class LibrarianViewSet(viewsets.ModelViewSet):
+class LibrarianViewSet(EagerLoadingQuerysetMixin, NDJSONStreamMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Librarian.objects.all()
     serializer_class = LibrarianSerializer
     permission_classes = [IsAdminUser]
@@ -79,7 +264,7 @@ class LibrarianViewSet(viewsets.ModelViewSet):
 # - Anyone can register (create)
 # - Admins can list/update/delete
 # ------------------------------
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(EagerLoadingQuerysetMixin, NDJSONStreamMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
 
@@ -90,45 +275,101 @@ class StudentViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
 
+    def get_throttles(self):
+        if self.action == 'create':
+            return [*super().get_throttles(), throttling.RegistrationThrottle()]
+        return super().get_throttles()
+
     def create(self, request, *args, **kwargs):
-        print("Received student registration data:", request.data)
         try:
             serializer = self.get_serializer(data=request.data)
             if serializer.is_valid():
-                print("Serializer is valid. Validated data:", serializer.validated_data)
                 student = serializer.save()
-                print(f"Student created successfully: {student}")
+                logger.info("student registered", extra={'student_id': student.pk, 'user_id': student.user_id})
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             else:
-                print("Serializer validation errors:", serializer.errors)
+                logger.info("student registration rejected", extra={'fields': sorted(serializer.errors)})
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            print(f"Error creating student: {str(e)}")
+        except HashingBusy:
+            raise
+        except Exception:
+            logger.exception("student registration failed")
             return Response(
                 {"error": "An error occurred during registration. Please try again."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    # Registrar file: email, name, student_number, optional password/first_name/last_name
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_import(self, request):
+        stream, fmt = _upload_stream(request)
+        if fmt not in bulk.FORMATS or stream is None:
+            return Response(
+                {"error": "Send a CSV or NDJSON body, or a 'file' upload."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = bulk.import_students(bulk.read_rows(stream, fmt))
+        logger.info("students imported", extra={'rows': report['rows'], 'registered': report['created']})
+        return Response(report, status=status.HTTP_200_OK)
+
 # ------------------------------
 # Book ViewSet
 # - Admins can manage books
 # - Others can only view
 # ------------------------------
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(EagerLoadingQuerysetMixin, CachedReadMixin, NDJSONStreamMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    cache_resource = 'books'
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_import', 'export']:
             permission_classes = [IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            limit = 20
+        books = search_books(query, limit) if query else Book.objects.none()
+        return Response(self.get_serializer(books, many=True).data)
+
+    # Body: text/csv, application/x-ndjson, or a multipart 'file' upload
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_import(self, request):
+        stream, fmt = _upload_stream(request)
+        if fmt not in bulk.FORMATS or stream is None:
+            return Response(
+                {"error": "Send a CSV or NDJSON body, or a 'file' upload."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = bulk.import_books(bulk.read_rows(stream, fmt))
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        fmt = request.query_params.get('fmt', 'ndjson')
+        if fmt not in bulk.FORMATS:
+            return Response({"error": "fmt must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(
+            bulk.export_books(fmt, settings.STREAM_CHUNK_SIZE),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+        return response
+
 # ------------------------------
 # Loan ViewSet (borrow and return books)
 # ------------------------------
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(EagerLoadingQuerysetMixin, NDJSONStreamMixin, CompiledListMixin, viewsets.ModelViewSet):
     queryset = Loan.objects.all()
     serializer_class = LoanSerializer
 
@@ -141,39 +382,28 @@ class LoanViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    def get_throttles(self):
+        if self.action == 'create':
+            return [*super().get_throttles(), throttling.BorrowThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self):
+        queryset = super().get_queryset()
         user = self.request.user
         if user.role == 'student':
-            return Loan.objects.filter(student__user=user)
-        return Loan.objects.all()
+            return queryset.filter(student__user=user)
+        return queryset
 
     def create(self, request, *args, **kwargs):
         try:
             student = Student.objects.get(user=request.user)
-            book_id = request.data.get('book_id')
-            book = Book.objects.get(id=book_id)
-
-            if not book.is_available:
-                return Response(
-                    {"error": "This book is currently not available."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            loan_data = {
-                'student': student.id,
-                'book': book_id,
-                'loan_date': request.data.get('loan_date', timezone.now().date()),
-                'return_date': None,
-                'is_returned': False
-            }
-
-            serializer = self.get_serializer(data=loan_data)
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-
-            book.is_available = False
-            book.save()
+            loan_date = serializers.DateField().to_internal_value(
+                request.data.get('loan_date') or timezone.now().date()
+            )
+
+            loan = borrow_book(student, request.data.get('book_id'), loan_date)
 
+            serializer = self.get_serializer(loan)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Student.DoesNotExist:
             return Response(
@@ -185,6 +415,13 @@ class LoanViewSet(viewsets.ModelViewSet):
                 {"error": "Book not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except BookUnavailable:
+            return Response(
+                {"error": "This book is currently not available."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except serializers.ValidationError as e:
+            return Response({"loan_date": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -193,14 +430,32 @@ class LoanViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def return_book(self, request, pk=None):
-        loan = self.get_object()
-        if not loan.is_returned:
-            loan.is_returned = True
-            loan.actual_return_date = timezone.now().date()
-            loan.book.is_available = True
-            loan.book.save()
-            loan.save()
+        return_loan(self.get_object())
         return Response({'status': 'Book returned successfully'})
+
+    # One student's active and archived loans, newest first.
+    # Students get their own; staff pass ?student=<id>.
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        if request.user.role == 'student':
+            student_id = Student.objects.filter(user=request.user).values_list('id', flat=True).first()
+        else:
+            student_id = request.query_params.get('student')
+            if student_id is None or not student_id.isdigit():
+                return Response({"error": "student must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = ('id', 'book_id', 'loan_date', 'return_date', 'actual_return_date')
+        active = Loan.objects.filter(student_id=student_id).values(
+            *columns, book_title=F('book__title'), returned=F('is_returned'), archived=Value(False)
+        )
+        archived = LoanArchive.objects.filter(student_id=student_id).values(
+            *columns, book_title=F('book__title'), returned=Value(True), archived=Value(True)
+        )
+        history = active.union(archived, all=True).order_by('-loan_date', '-id')
+
+        paginator = LimitOffsetPagination()
+        page = paginator.paginate_queryset(history, request, view=self)
+        return paginator.get_paginated_response(page)
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def register_student(request):
@@ -213,26 +468,22 @@ def register_student(request):
             'role': 'student'
         }
 
-        # User kaydı
-        user_serializer = UserSerializer(data=user_data)
-        user_serializer.is_valid(raise_exception=True)
-        user = user_serializer.save()
-        user.set_password(user_data['password'])  # şifreyi hashle
-        user.save()
-
-        # Student kaydı
-        student_data = {
-            'user': user.id,
-            'name': request.data.get('name'),
-            'student_number': request.data.get('student_number'),
-            'email': request.data.get('email')
-        }
+        # Kullanıcı ve öğrenci profili birlikte oluşturulur ya da hiçbiri
+        with transaction.atomic():
+            # User kaydı (UserSerializer.create şifreyi bir kez hashler)
+            user_serializer = UserSerializer(data=user_data)
+            user_serializer.is_valid(raise_exception=True)
+            user = user_serializer.save()
 
-        student_serializer = StudentSerializer(data=student_data)
-        student_serializer.is_valid(raise_exception=True)
-        student_serializer.save()
+            # Student kaydı
+            Student.objects.create(
+                user=user,
+                name=request.data.get('name'),
+                student_number=request.data.get('student_number')
+            )
 
         return Response({"message": "Kayıt başarılı"}, status=status.HTTP_201_CREATED)
 
-    except Exception as e:
+    # HashingBusy is not caught: DRF answers 503 with Retry-After, as for login
+    except (serializers.ValidationError, IntegrityError) as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
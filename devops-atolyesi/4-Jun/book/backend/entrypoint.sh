@@ -1,38 +1,30 @@
 #!/bin/bash
 set -e
 
-echo "🔎 ENV DUMP:"
-env
+SERVER_MODE="${SERVER_MODE:-wsgi}"
+export SERVER_MODE
 
-echo "⏳ Waiting for the database to be ready at $DB_HOST:$DB_PORT ..."
-until nc -z "$DB_HOST" "$DB_PORT"; do
-  echo "🔁 Waiting for DB..."
-  sleep 2
-done
-echo "✅ Port is reachable. Giving DB 3 seconds more to stabilize..."
-sleep 3
-
-echo "🚀 Running migrations..."
-python manage.py migrate --noinput || {
-  echo "⚠️ Migration failed. Retrying with --fake-initial..."
-  python manage.py migrate --fake-initial
-}
-
-echo "📋 Showing migrations for api app..."
-python manage.py showmigrations api
-
-# Run seed only if Book table is empty
-BOOK_COUNT=$(python manage.py shell -c 'from api.models import Book; print(Book.objects.count())' 2>/dev/null || echo "ERROR")
-
-if [ "$BOOK_COUNT" = "0" ]; then
-  echo "🌱 Seeding initial data..."
-  python manage.py seed
-elif [ "$BOOK_COUNT" = "ERROR" ]; then
-  echo "❌ Book check failed. Possible migration or import error."
-  exit 1
+# DB wait (with backoff), migrations only if needed, seed on an empty catalog — one Python process
+echo "🚀 Bootstrapping..."
+if [ "$SERVER_MODE" = "worker" ]; then
+  # The backend container migrates and seeds; workers only wait until it has
+  python manage.py bootstrap --timeout "${DB_WAIT_TIMEOUT:-60}" --wait-for-migrations --skip-seed --skip-warmup
 else
-  echo "ℹ️ Seed skipped. Book table already has data."
+  python manage.py bootstrap --timeout "${DB_WAIT_TIMEOUT:-60}"
 fi
 
-echo "📦 Starting Django server..."
-exec python manage.py runserver 0.0.0.0:8000
+if [ "$SERVER_MODE" = "dev" ]; then
+  echo "📦 Starting Django development server..."
+  exec python manage.py runserver 0.0.0.0:8000
+elif [ "$SERVER_MODE" = "worker" ]; then
+  echo "👷 Starting background task workers..."
+  exec python manage.py run_worker
+elif [ "$SERVER_MODE" = "asgi" ]; then
+  # Django advises against persistent connections under ASGI
+  export DB_CONN_MAX_AGE="${DB_CONN_MAX_AGE:-0}"
+  echo "📦 Starting gunicorn (uvicorn workers)..."
+  exec gunicorn library.asgi:application -c gunicorn.conf.py
+else
+  echo "📦 Starting gunicorn (threaded workers)..."
+  exec gunicorn library.wsgi:application -c gunicorn.conf.py
+fi
@@ -0,0 +1,53 @@
+# Gunicorn settings used by entrypoint.sh (SERVER_MODE=wsgi|asgi)
+import multiprocessing
+import os
+import shutil
+
+cpu_count = multiprocessing.cpu_count()
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+if server_mode == 'asgi':
+    # One event loop per core
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count))
+else:
+    # Threads overlap DB waits; each thread keeps its own persistent DB connection
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Graceful shutdown: finish in-flight requests on SIGTERM
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# Recycle workers now and then to cap memory growth
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+# ------------------------------
+# Metrics across workers
+# - Workers write their totals under METRICS_DIR; /api/metrics/ adds them up
+# - Fresh on every start; an exited worker's totals move to retired.json
+# ------------------------------
+metrics_dir = os.environ.setdefault('METRICS_DIR', '/tmp/library-metrics')
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def worker_exit(server, worker):
+    from api import metrics
+    metrics.registry.flush()
+
+
+def child_exit(server, worker):
+    from api import metrics
+    metrics.retire(metrics_dir, worker.pid)
@@ -1,5 +1,8 @@
+import importlib.util
 import os
 from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
 # from decouple import config  # 🔒 Optional fallback
 
 # 📁 Project base directory
@@ -36,6 +39,10 @@ INSTALLED_APPS = [
 # 🧱 Middleware stack
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be first for CORS to work
+    'api.middleware.CompressionMiddleware',  # br/gzip; outside the timing, which sees uncompressed sizes
+    'api.middleware.PerformanceMiddleware',  # Timing, SQL and Server-Timing for everything below
+    'api.middleware.ConcurrencyLimitMiddleware',  # 429 once too many requests are in flight
+    'api.middleware.ReplicaRoutingMiddleware',  # Safe reads to replicas, writers pinned to the primary
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -93,6 +100,10 @@ DATABASES = {
         # 'PORT': config('DB_PORT', default='3306'),
         'PORT': os.environ.get('DB_PORT', '3306'),
 
+        # Keep connections open between requests and ping them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+
         # Extra MySQL options
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
@@ -101,6 +112,30 @@ DATABASES = {
     }
 }
 
+# 🧪 DB_ENGINE=sqlite: local SQLite file, e.g. for `manage.py test` without MySQL
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+
+# 📚 Read replicas: DB_REPLICA_HOSTS=host[:port],host[:port]
+# Same credentials as the primary unless DB_REPLICA_USER/DB_REPLICA_PASSWORD are set
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_index}')
+
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+
 # 👤 Custom user model
 AUTH_USER_MODEL = 'api.User'
 
@@ -112,6 +147,35 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# 🔑 Password hashing profile: argon2 (memory-hard, needs argon2-cffi), scrypt or pbkdf2.
+# Hashes from the other profiles still verify and are rehashed on the next login.
+PASSWORD_HASHER_PROFILE = os.environ.get(
+    'PASSWORD_HASHER_PROFILE',
+    'argon2' if importlib.util.find_spec('argon2') else 'scrypt'
+)
+PASSWORD_HASHER_PARAMS = {
+    # Defaults follow the OWASP minimums: argon2id 19 MiB / 2 passes, scrypt 16 MiB
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', '2')),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', '19456')),  # KiB
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', '1')),
+    'SCRYPT_WORK_FACTOR': int(os.environ.get('SCRYPT_WORK_FACTOR', str(2 ** 14))),
+    'SCRYPT_BLOCK_SIZE': int(os.environ.get('SCRYPT_BLOCK_SIZE', '8')),
+    'SCRYPT_PARALLELISM': int(os.environ.get('SCRYPT_PARALLELISM', '1')),
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', '720000')),
+}
+_PROFILE_HASHERS = {
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+    'scrypt': 'api.hashers.ScryptPasswordHasher',
+    'pbkdf2': 'api.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PROFILE_HASHERS[PASSWORD_HASHER_PROFILE]] + [
+    path for profile, path in _PROFILE_HASHERS.items() if profile != PASSWORD_HASHER_PROFILE
+]
+
+# 🧮 Concurrent password hashes per process, and how many may wait before 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_BACKLOG = int(os.environ.get('PASSWORD_HASH_BACKLOG', PASSWORD_HASH_WORKERS * 4))
+
 # 🌐 Localization
 LANGUAGE_CODE = 'tr-tr'
 TIME_ZONE = 'Europe/Istanbul'
@@ -127,13 +191,136 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # 🔄 Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Keyset pagination over (created_at, id); ?stream=ndjson for full exports
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', '50')),
+    # JSON via orjson when installed; ?format=columnar / msgpack for large lists
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.ColumnarJSONRenderer',
+        *(['api.renderers.MessagePackRenderer'] if importlib.util.find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token buckets (api.throttling); '10/min' = burst of 10, refilled over a minute
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.AnonRateThrottle',
+        'api.throttling.UserRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_ANON_RATE', '300/min'),
+        'user': os.environ.get('THROTTLE_USER_RATE', '1200/min'),
+        # Failed logins only: per client IP (a whole campus behind NAT) and per account
+        'login': os.environ.get('THROTTLE_LOGIN_RATE', '60/min'),
+        'login-account': os.environ.get('THROTTLE_LOGIN_ACCOUNT_RATE', '5/min'),
+        'register': os.environ.get('THROTTLE_REGISTER_RATE', '10/hour'),
+        'borrow': os.environ.get('THROTTLE_BORROW_RATE', '30/min'),
+    },
+    # Proxies in front of the app whose X-Forwarded-For entries to trust: the backend ALB in AWS.
+    # Clients can write anything before those entries; set 0 when clients connect directly (docker-compose)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '1')),
+}
+
+# 🧠 Cache backends (shared Redis tier only when REDIS_URL is set)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '10000'))},
+    },
+}
+if os.environ.get('REDIS_URL'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# 🔐 Token auth cache: in-process LRU+TTL, plus the shared cache if configured. Revocations
+# reach other workers through the shared tier, so without it the in-process tier is off
+# by default (TOKEN_CACHE_LOCAL_TTL>0 is only safe for a single-process server)
+TOKEN_AUTH_CACHE = {
+    'LOCAL_TTL': int(os.environ.get('TOKEN_CACHE_LOCAL_TTL', '30' if 'shared' in CACHES else '0')),
+    'LOCAL_MAXSIZE': int(os.environ.get('TOKEN_CACHE_LOCAL_MAXSIZE', '10000')),
+    'SHARED_ALIAS': 'shared' if 'shared' in CACHES else None,
+    'SHARED_TTL': int(os.environ.get('TOKEN_CACHE_SHARED_TTL', '300')),
+}
+
+# 🗃️ Response cache for catalog reads. Needs the shared tier (REDIS_URL): invalidation in
+# one worker or management command must reach every worker, which a per-process locmem
+# cache cannot do, so without it responses are not cached. RESPONSE_CACHE_ALIAS=default
+# is only safe for a single-process server (runserver)
+RESPONSE_CACHE = {
+    'ALIAS': os.environ.get('RESPONSE_CACHE_ALIAS', 'shared' if 'shared' in CACHES else None),
+    'TTL': int(os.environ.get('RESPONSE_CACHE_TTL', '300')),
+}
+
+# 🧮 Admin changelists above this many rows use MySQL's estimated table size
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# 🗜️ Brotli level for GET responses (0-11; 5 is close to gzip's speed with smaller output)
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+# 🚦 Rate limiting: buckets live in the shared cache (Redis) when configured,
+# per process otherwise or while Redis is unreachable
+THROTTLE = {
+    'SHARED_ALIAS': 'shared' if 'shared' in CACHES else None,
+    'LOCAL_MAXSIZE': 50000,
+}
+
+# 🛑 Admission control: requests in flight per process before answering 429
+# gthread (SERVER_MODE=wsgi) runs GUNICORN_THREADS requests at once and queues the rest out of sight;
+# one thread less keeps a thread free to answer the overflow with 429 (and health checks) right away
+if os.environ.get('SERVER_MODE', 'wsgi') == 'wsgi':
+    _default_in_flight = max(1, int(os.environ.get('GUNICORN_THREADS', '4')) - 1)
+else:
+    _default_in_flight = 32
+ADMISSION = {
+    'MAX_IN_FLIGHT': int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', _default_in_flight)),
+    'EXEMPT_PATHS': ('/api/health/', '/api/async/health/'),
+}
+
+# ✍️ Read-your-writes: after a write, a client reads from the primary for this long
+# (the pin is kept in the shared cache, so every worker sees it)
+READ_YOUR_WRITES = {
+    'SECONDS': int(os.environ.get('READ_YOUR_WRITES_SECONDS', '10')),
+    'CACHE_ALIAS': 'shared' if 'shared' in CACHES else 'default',
+}
+if DATABASE_REPLICAS and 'shared' not in CACHES:
+    # Per-process pins: a write in one worker would not keep the others off the replicas
+    raise ImproperlyConfigured("DB_REPLICA_HOSTS needs REDIS_URL for read-your-writes pins.")
+
+# 🧵 Background tasks (api.tasks, run by `manage.py run_worker`)
+TASKS = {
+    'WORKER_PROCESSES': int(os.environ.get('TASK_WORKER_PROCESSES', '2')),
+    # Seconds before a task whose worker died is handed to another worker
+    'LEASE': int(os.environ.get('TASK_LEASE_SECONDS', '300')),
+    # Retry after 10s, 20s, 40s, ... at most an hour
+    'RETRY_BASE': 10,
+    'RETRY_MAX': 3600,
+    'KEEP_DAYS': int(os.environ.get('TASK_KEEP_DAYS', '7')),
+    # Task name -> seconds between runs
+    'PERIODIC': {
+        'overdue_sweep': 24 * 3600,
+        'refresh_loan_summary': 300,
+        'purge_tasks': 24 * 3600,
+    },
 }
 
+# 📧 Email (loan notifications); printed to the console unless a backend is configured
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'library@localhost')
+
+# 📤 Batch size for ?stream=ndjson exports
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '2000'))
+
 # 🌍 CORS allowed origins (standard ones from env)
 CORS_ALLOWED_ORIGINS = os.environ.get(
     'CORS_ALLOWED_ORIGINS',
@@ -155,4 +342,39 @@ CSRF_TRUSTED_ORIGINS = os.environ.get(
     'http://localhost:8080'
 ).split(',')
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+# 📈 /api/metrics/ sums every worker's totals from files in this directory (gunicorn.conf.py sets it);
+# unset, each process reports only its own requests
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+
+# ⏱️ Log a warning when one statement runs this many times in a request (N+1)
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', '5'))
+
+# 📝 Logging: JSON lines on stdout through a background queue, secrets redacted,
+# high-volume INFO events (successful logins) sampled
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'redact': {'()': 'api.log.RedactFilter'},
+        'sample': {
+            '()': 'api.log.SampleFilter',
+            'rates': {'api.auth': float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))},
+        },
+    },
+    'formatters': {
+        'json': {'()': 'api.log.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'api.log.QueueStreamHandler',
+            'stream': 'ext://sys.stdout',
+            'formatter': 'json',
+            'filters': ['sample', 'redact'],
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    },
+}
@@ -0,0 +1,57 @@
+"""
+Startup timing for `manage.py bootstrap`.
+
+manage.py calls install() before Django loads. It then records how long
+the settings module and each installed app (its package and models module)
+take to import. Timings include anything those modules import themselves.
+"""
+
+import importlib.machinery
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()
+timings = {}
+_watched = set()
+
+
+def _time_loader(loader, name):
+    exec_module = loader.exec_module
+
+    def timed_exec_module(module):
+        started = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            timings[name] = time.perf_counter() - started
+            if name == os.environ.get('DJANGO_SETTINGS_MODULE'):
+                _watch_apps(module)
+
+    loader.exec_module = timed_exec_module
+
+
+def _watch_apps(settings_module):
+    for entry in getattr(settings_module, 'INSTALLED_APPS', ()):
+        # 'api.apps.ApiConfig' -> 'api'
+        package = entry.rsplit('.apps.', 1)[0]
+        _watched.update((package, f'{package}.models'))
+
+
+class ImportTimer:
+    """Meta path finder that only wraps the loaders of watched modules."""
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in _watched:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is not None and hasattr(spec.loader, 'exec_module'):
+            _time_loader(spec.loader, fullname)
+        return spec
+
+
+def install():
+    global STARTED
+    STARTED = time.perf_counter()
+    _watched.add(os.environ.get('DJANGO_SETTINGS_MODULE'))
+    sys.meta_path.insert(0, ImportTimer())
@@ -7,6 +7,9 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library.settings')
+    if sys.argv[1:2] == ['bootstrap']:
+        from library import startup
+        startup.install()
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { Button } from "@/components/ui/button";
 import { useToast } from "@/components/ui/use-toast";
 import {
@@ -37,11 +37,18 @@ const Books = () => {
   // ✅ API base URL, .env dosyasından okunur
   const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
-  const { data: books, isLoading } = useQuery({
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['books'],
-    queryFn: async () => {
+    initialPageParam: `${API_BASE_URL}/api/books/`,
+    queryFn: async ({ pageParam }) => {
       console.log('Fetching books...');
-      const response = await fetch(`${API_BASE_URL}/api/books/`, {
+      const response = await fetch(pageParam, {
         headers: {
           'Authorization': `Token ${token}`,
         },
@@ -53,7 +60,10 @@ const Books = () => {
       console.log('Fetched books:', data);
       return data;
     },
+    // Liste uçları cursor ile sayfalı döner: { next, previous, results }
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
   });
+  const books = data?.pages.flatMap((page) => page.results ?? page);
 
   const addBookMutation = useMutation({
     mutationFn: async (bookData: { title: string; author: string }) => {
@@ -202,6 +212,18 @@ const Books = () => {
           </TableBody>
         </Table>
       </div>
+
+      {hasNextPage && (
+        <div className="flex justify-center mt-4">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? 'Yükleniyor...' : 'Daha Fazla Yükle'}
+          </Button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { Button } from "@/components/ui/button";
 import { useToast } from "@/components/ui/use-toast";
 import {
@@ -28,11 +28,18 @@ const Loans = () => {
   // ✅ API base URL environment değişkeninden okunuyor
   const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
-  const { data: loans, isLoading } = useQuery({
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['loans'],
-    queryFn: async () => {
+    initialPageParam: `${API_BASE_URL}/api/loans/`,
+    queryFn: async ({ pageParam }) => {
       console.log('Fetching loans...');
-      const response = await fetch(`${API_BASE_URL}/api/loans/`, {
+      const response = await fetch(pageParam, {
         headers: {
           'Authorization': `Token ${token}`,
         },
@@ -44,7 +51,10 @@ const Loans = () => {
       console.log('Fetched loans:', data);
       return data;
     },
+    // Liste uçları cursor ile sayfalı döner: { next, previous, results }
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
   });
+  const loans = data?.pages.flatMap((page) => page.results ?? page);
 
   const returnBookMutation = useMutation({
     mutationFn: async (loanId: number) => {
@@ -124,6 +134,18 @@ const Loans = () => {
           </TableBody>
         </Table>
       </div>
+
+      {hasNextPage && (
+        <div className="flex justify-center mt-4">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? 'Yükleniyor...' : 'Daha Fazla Yükle'}
+          </Button>
+        </div>
+      )}
     </div>
   );
 };
@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { Button } from "@/components/ui/button";
 import { useToast } from "@/components/ui/use-toast";
 import {
@@ -39,11 +39,18 @@ const Students = () => {
   const [isDialogOpen, setIsDialogOpen] = useState(false);
 
   // 🇬🇧 Fetch all students from backend API
-  const { data: students, isLoading } = useQuery({
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['students'],
-    queryFn: async () => {
+    initialPageParam: `${import.meta.env.VITE_API_BASE_URL}/api/students/`,
+    queryFn: async ({ pageParam }) => {
       console.log('Fetching students...');
-      const response = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/students/`, {
+      const response = await fetch(pageParam, {
         headers: {
           'Authorization': `Token ${token}`,
         },
@@ -55,7 +62,10 @@ const Students = () => {
       console.log('Fetched students:', data);
       return data;
     },
+    // Liste uçları cursor ile sayfalı döner: { next, previous, results }
+    getNextPageParam: (lastPage) => lastPage.next ?? undefined,
   });
+  const students = data?.pages.flatMap((page) => page.results ?? page);
 
   // 🇬🇧 Add a new student to backend
   const addStudentMutation = useMutation({
@@ -179,6 +189,18 @@ const Students = () => {
           </TableBody>
         </Table>
       </div>
+
+      {hasNextPage && (
+        <div className="flex justify-center mt-4">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? 'Yükleniyor...' : 'Daha Fazla Yükle'}
+          </Button>
+        </div>
+      )}
     </div>
   );
 };